@@ -13,71 +13,113 @@ Usage:
     python cli.py zones                     # List zones by override frequency
     python cli.py hours                     # Show hourly distribution
     python cli.py export events.json        # Export events to JSON
+    python cli.py vacuum                    # Reclaim free space in the database
 """
 
 import argparse
-import json
+import functools
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from logger import ForensicLogger
 import config
+from jsonutil import dumps_str
 
+if TYPE_CHECKING:
+    from logger import ForensicLogger
 
+# Table headers; rows are padded with str.ljust to the same column widths
+_EVENT_HEADER = " ".join((
+    "Time".ljust(18), "Zone".ljust(20), "Event".ljust(18), "Change".ljust(15), "Type".ljust(20)
+))
+_ZONE_HEADER = " ".join(("Zone".ljust(25), "Overrides".ljust(12), "Suspicious".ljust(12), "Bar"))
+_SUSPICIOUS_PREFIX = "⚠️ "
+
+
+@functools.lru_cache(maxsize=1)
+def _get_logger() -> "ForensicLogger":
+    """Return the process-wide ForensicLogger (one connection per process)."""
+    # Imported here: logger pulls in poller and the Evohome client library,
+    # which `cli.py --help` and parse errors never need
+    from logger import ForensicLogger
+    return ForensicLogger()
+
+
+@functools.lru_cache(maxsize=4096)
 def format_timestamp(iso_str: str) -> str:
     """Format ISO timestamp for display."""
+    # Fast path: stored timestamps are ISO-8601, so slice instead of parsing
+    if len(iso_str) >= 16 and iso_str[10] in ("T", " "):
+        return iso_str[:10] + " " + iso_str[11:16]
     try:
         dt = datetime.fromisoformat(iso_str)
         return dt.strftime("%Y-%m-%d %H:%M")
-    except:
+    except ValueError:
         return iso_str
 
 
 def cmd_events(args):
     """Show override events."""
-    logger = ForensicLogger()
-    
-    # Handle zone name to ID lookup (simplified - just filter by name in results)
-    events = logger.get_override_events(
+    logger = _get_logger()
+
+    # Zone name and limit filters are applied in SQL; a limit of 0 or less
+    # means no limit
+    limit = args.limit if args.limit > 0 else None
+    filters = dict(
         override_type=args.type,
         days=args.days,
-        suspicious_only=args.suspicious
+        suspicious_only=args.suspicious,
+        zone_name_like=args.zone
     )
-    
-    # Filter by zone name if provided
-    if args.zone:
-        events = [e for e in events if args.zone.lower() in e["zone_name"].lower()]
-    
+    events = logger.get_override_events(limit=limit, **filters)
+
     if not events:
         print("No events found matching criteria.")
         return
-    
-    print(f"\n{'Time':<18} {'Zone':<20} {'Event':<18} {'Change':<15} {'Type':<20}")
-    print("-" * 95)
-    
-    for e in events[:args.limit]:
+
+    total = len(events)
+    if total == limit:
+        total = logger.count_override_events(**filters)
+
+    # Build the whole table and write it in one go rather than per row
+    lines = [
+        "",
+        _EVENT_HEADER,
+        "-" * 95,
+    ]
+
+    append = lines.append
+    for e in events:
         time_str = format_timestamp(e["timestamp"])
         event_type = e["event_type"].replace("_", " ").title()
         change = f"{e['previous_target']}° → {e['new_target']}°"
-        override_type = e.get("override_type", "-") or "-"
+        # Every column is present in event rows; NULL means unclassified
+        override_type = e["override_type"] or "-"
         
-        suspicious = "⚠️ " if e.get("is_suspicious") else ""
+        suspicious = _SUSPICIOUS_PREFIX if e["is_suspicious"] else ""
         
-        print(f"{time_str:<18} {e['zone_name']:<20} {event_type:<18} {change:<15} {suspicious}{override_type:<20}")
+        append(" ".join((
+            time_str.ljust(18),
+            e["zone_name"].ljust(20),
+            event_type.ljust(18),
+            change.ljust(15),
+            suspicious + override_type.ljust(20),
+        )))
     
-    if len(events) > args.limit:
-        print(f"\n... and {len(events) - args.limit} more events. Use --limit to see more.")
-    
-    print(f"\nTotal: {len(events)} events in last {args.days} days")
+    if total > len(events):
+        lines.append(f"\n... and {total - len(events)} more events. Use --limit to see more.")
+
+    lines.append(f"\nTotal: {total} events in last {args.days} days")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_stats(args):
     """Show statistics summary."""
-    logger = ForensicLogger()
+    logger = _get_logger()
     stats = logger.get_diagnostics_summary(days=args.days)
     
     print(f"\n{'='*50}")
@@ -99,66 +141,139 @@ def cmd_stats(args):
 
 def cmd_zones(args):
     """List zones by override frequency."""
-    logger = ForensicLogger()
+    logger = _get_logger()
     zones = logger.get_zone_override_frequency(days=args.days)
     
     if not zones:
         print("No override data found.")
         return
     
-    print(f"\n{'Zone':<25} {'Overrides':<12} {'Suspicious':<12} {'Bar'}")
-    print("-" * 70)
+    lines = ["", _ZONE_HEADER, "-" * 70]
     
-    max_count = zones[0]["override_count"] if zones else 1
+    max_count = zones[0]["override_count"] or 1
     
     for z in zones:
-        bar_len = int((z["override_count"] / max_count) * 30)
-        bar = "█" * bar_len
-        susp = f"({z['suspicious_count']})" if z['suspicious_count'] else ""
+        count = z["override_count"]
+        suspicious_count = z["suspicious_count"]
+        bar = "█" * ((count * 30) // max_count)
+        susp = f"({suspicious_count})" if suspicious_count else ""
         
-        print(f"{z['zone_name']:<25} {z['override_count']:<12} {susp:<12} {bar}")
+        lines.append(" ".join((z["zone_name"].ljust(25), str(count).ljust(12), susp.ljust(12), bar)))
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def cmd_hours(args):
     """Show hourly distribution of overrides."""
-    logger = ForensicLogger()
+    logger = _get_logger()
     hours = logger.get_override_time_distribution(days=args.days)
     
     if not hours:
         print("No override data found.")
         return
     
-    # Fill in missing hours with 0
-    hour_counts = {h["hour"]: h["count"] for h in hours}
-    max_count = max(hour_counts.values()) if hour_counts else 1
-    
-    print(f"\nOverride distribution by hour (last {args.days} days):\n")
+    # One slot per hour; hours with no overrides stay at 0
+    counts = [0] * 24
+    for h in hours:
+        counts[h["hour"]] = h["count"]
+    max_count = max(counts) or 1
     
-    for hour in range(24):
-        count = hour_counts.get(hour, 0)
-        bar_len = int((count / max_count) * 40) if max_count > 0 else 0
-        bar = "█" * bar_len
-        print(f"{hour:02d}:00  {count:>4}  {bar}")
+    lines = [f"\nOverride distribution by hour (last {args.days} days):\n"]
+    lines.extend(
+        f"{hour:02d}:00  {count:>4}  {'█' * ((count * 40) // max_count)}"
+        for hour, count in enumerate(counts)
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _write_export(f, events, days: int, indent: bool) -> int:
+    """Stream the export envelope and events to f, returning the event count."""
+    sep = ",\n" if indent else ","
+    f.write('{"exported_at": %s, "days": %d, "events": [' % (
+        dumps_str(datetime.now().isoformat()), days
+    ))
+    count = 0
+    for event in events:
+        if count:
+            f.write(sep)
+        f.write(dumps_str(event, indent))
+        count += 1
+    f.write('], "event_count": %d}\n' % count)
+    return count
 
 
 def cmd_export(args):
     """Export events to JSON."""
-    logger = ForensicLogger()
-    events = logger.get_override_events(days=args.days)
-    
-    output = {
-        "exported_at": datetime.now().isoformat(),
-        "days": args.days,
-        "event_count": len(events),
-        "events": events
-    }
-    
+    logger = _get_logger()
+    events = logger.iter_override_events(days=args.days)
+
     if args.output == "-":
-        print(json.dumps(output, indent=2))
+        # Only pretty-print for humans; indentation inflates piped output
+        indent = sys.stdout.isatty()
+        _write_export(sys.stdout, events, args.days, indent)
     else:
-        with open(args.output, "w") as f:
-            json.dump(output, f, indent=2)
-        print(f"Exported {len(events)} events to {args.output}")
+        with open(args.output, "w", encoding="utf-8", buffering=1 << 20) as f:
+            count = _write_export(f, events, args.days, False)
+        print(f"Exported {count} events to {args.output}")
+
+
+def cmd_vacuum(args):
+    """Rebuild the database to reclaim free space."""
+    logger = _get_logger()
+    size_before = config.DATABASE_PATH.stat().st_size
+    logger.vacuum()
+    size_after = config.DATABASE_PATH.stat().st_size
+    print(f"Vacuumed {config.DATABASE_PATH}: {size_before / 1024:.0f} KB → {size_after / 1024:.0f} KB")
+
+
+def _add_events_parser(subparsers):
+    parser = subparsers.add_parser("events", help="Show override events")
+    parser.add_argument("--zone", "-z", help="Filter by zone name")
+    parser.add_argument("--type", "-t", help="Filter by override type")
+    parser.add_argument("--suspicious", "-s", action="store_true", help="Only suspicious events")
+    parser.add_argument("--days", "-d", type=int, default=30, help="Days to look back (default: 30)")
+    parser.add_argument("--limit", "-l", type=int, default=50, help="Max events to show, 0 for all (default: 50)")
+    return parser
+
+
+def _add_stats_parser(subparsers):
+    parser = subparsers.add_parser("stats", help="Show statistics summary")
+    parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
+    return parser
+
+
+def _add_zones_parser(subparsers):
+    parser = subparsers.add_parser("zones", help="List zones by override frequency")
+    parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
+    return parser
+
+
+def _add_hours_parser(subparsers):
+    parser = subparsers.add_parser("hours", help="Show hourly distribution")
+    parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
+    return parser
+
+
+def _add_export_parser(subparsers):
+    parser = subparsers.add_parser("export", help="Export events to JSON")
+    parser.add_argument("output", help="Output file (use '-' for stdout)")
+    parser.add_argument("--days", "-d", type=int, default=30, help="Days to export")
+    return parser
+
+
+def _add_vacuum_parser(subparsers):
+    return subparsers.add_parser("vacuum", help="Reclaim free space (stop the monitor first)")
+
+
+# Subcommand name -> (parser builder, handler)
+COMMANDS = {
+    "events": (_add_events_parser, cmd_events),
+    "stats": (_add_stats_parser, cmd_stats),
+    "zones": (_add_zones_parser, cmd_zones),
+    "hours": (_add_hours_parser, cmd_hours),
+    "export": (_add_export_parser, cmd_export),
+    "vacuum": (_add_vacuum_parser, cmd_vacuum),
+}
 
 
 def main():
@@ -168,35 +283,14 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command", help="Command")
     
-    # Events command
-    events_parser = subparsers.add_parser("events", help="Show override events")
-    events_parser.add_argument("--zone", "-z", help="Filter by zone name")
-    events_parser.add_argument("--type", "-t", help="Filter by override type")
-    events_parser.add_argument("--suspicious", "-s", action="store_true", help="Only suspicious events")
-    events_parser.add_argument("--days", "-d", type=int, default=30, help="Days to look back (default: 30)")
-    events_parser.add_argument("--limit", "-l", type=int, default=50, help="Max events to show (default: 50)")
-    events_parser.set_defaults(func=cmd_events)
-    
-    # Stats command
-    stats_parser = subparsers.add_parser("stats", help="Show statistics summary")
-    stats_parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
-    stats_parser.set_defaults(func=cmd_stats)
-    
-    # Zones command
-    zones_parser = subparsers.add_parser("zones", help="List zones by override frequency")
-    zones_parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
-    zones_parser.set_defaults(func=cmd_zones)
-    
-    # Hours command
-    hours_parser = subparsers.add_parser("hours", help="Show hourly distribution")
-    hours_parser.add_argument("--days", "-d", type=int, default=30, help="Days to analyze")
-    hours_parser.set_defaults(func=cmd_hours)
-    
-    # Export command
-    export_parser = subparsers.add_parser("export", help="Export events to JSON")
-    export_parser.add_argument("output", help="Output file (use '-' for stdout)")
-    export_parser.add_argument("--days", "-d", type=int, default=30, help="Days to export")
-    export_parser.set_defaults(func=cmd_export)
+    # Only build the subparser that will actually run; fall back to all of
+    # them for --help, typos and a missing command
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    selected = [command] if command in COMMANDS else list(COMMANDS)
+    
+    for name in selected:
+        build_parser, handler = COMMANDS[name]
+        build_parser(subparsers).set_defaults(func=handler)
     
     args = parser.parse_args()
     
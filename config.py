@@ -36,7 +36,8 @@ POLL_INTERVAL_SECONDS = 300
 # ALERT SETTINGS
 # =============================================================================
 # Only alert on overrides to these "suspicious" temperatures (empty = alert on all)
-SUSPICIOUS_TEMPS = [35.0, 5.0]  # Known firmware bug values
+# A list also works in config_local.py; it is converted below.
+SUSPICIOUS_TEMPS = frozenset({35.0, 5.0})  # Known firmware bug values
 
 # Alert on ANY override, not just suspicious ones
 ALERT_ON_ALL_OVERRIDES = True
@@ -85,3 +86,7 @@ try:
     from config_local import *
 except ImportError:
     pass
+
+# config_local.py may define SUSPICIOUS_TEMPS as a list; membership is
+# tested on every poll, so normalise it once here for all consumers
+SUSPICIOUS_TEMPS = frozenset(SUSPICIOUS_TEMPS)
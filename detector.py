@@ -4,9 +4,10 @@ Evohome HR92 Monitor - Override Detector
 Compares states, detects overrides, and classifies them by likely cause.
 """
 
+import bisect
 import logging
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
@@ -15,6 +16,9 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Evohome schedules name days; Python numbers them (Monday == 0)
+_DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 
 class OverrideType(Enum):
     """Classification of override causes based on known patterns."""
@@ -28,7 +32,29 @@ class OverrideType(Enum):
     MULTI_ZONE_SYNC = "multi_zone_sync"   # Multi-room zone sync bug
 
 
-@dataclass
+# Override types that are flagged as suspicious regardless of target temp
+_SUSPICIOUS_TYPES = frozenset({
+    OverrideType.FIRMWARE_35C_BUG,
+    OverrideType.FIRMWARE_5C_BUG,
+    OverrideType.PRE_SCHEDULE_DROP,
+    OverrideType.COMMS_LOSS,
+})
+
+# Classification thresholds, bound once at import
+_PRE_SCHEDULE_DROP_WINDOW_MINS = config.PRE_SCHEDULE_DROP_WINDOW_MINS
+_TEMP_THRESHOLD_WARNING = config.TEMP_THRESHOLD_WARNING
+
+# Parsed-schedule placeholder for zones with no usable schedule
+_NO_SCHEDULE = {}
+
+# Known firmware bug setpoints -> (type, confidence, notes)
+_FIRMWARE_TEMPS = {
+    35.0: (OverrideType.FIRMWARE_35C_BUG, 0.9, "Target is 35°C - known firmware bug value"),
+    5.0: (OverrideType.FIRMWARE_5C_BUG, 0.7, "Target is 5°C - possible firmware bug or comms loss"),
+}
+
+
+@dataclass(slots=True)
 class OverrideEvent:
     """Represents a detected override event with forensic data."""
     zone_id: str
@@ -57,6 +83,18 @@ class OverrideEvent:
     is_suspicious: bool = False
     diagnostic_notes: str = ""
     
+    # Derived once at construction; used when logging and serializing
+    timestamp_epoch: int = field(init=False, repr=False, compare=False)
+    timestamp_iso: str = field(init=False, repr=False, compare=False)
+    next_schedule_change_iso: Optional[str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.timestamp_epoch = int(self.timestamp.timestamp())
+        self.timestamp_iso = self.timestamp.isoformat()
+        self.next_schedule_change_iso = (
+            self.next_schedule_change.isoformat() if self.next_schedule_change else None
+        )
+    
     def to_alert_message(self) -> str:
         """Format as a notification message."""
         import config
@@ -93,7 +131,7 @@ class OverrideEvent:
         return {
             "zone_id": self.zone_id,
             "zone_name": self.zone_name,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp_iso,
             "previous_mode": self.previous_mode,
             "new_mode": self.new_mode,
             "previous_target": self.previous_target,
@@ -102,7 +140,7 @@ class OverrideEvent:
             "override_type": self.override_type.value,
             "confidence": self.confidence,
             "scheduled_target": self.scheduled_target,
-            "next_schedule_change": self.next_schedule_change.isoformat() if self.next_schedule_change else None,
+            "next_schedule_change": self.next_schedule_change_iso,
             "next_scheduled_temp": self.next_scheduled_temp,
             "minutes_to_next_change": self.minutes_to_next_change,
             "temp_delta_from_schedule": self.temp_delta_from_schedule,
@@ -111,7 +149,7 @@ class OverrideEvent:
         }
 
 
-@dataclass 
+@dataclass(slots=True)
 class ClearedOverrideEvent:
     """Represents an override being cleared (return to schedule)."""
     zone_id: str
@@ -122,6 +160,12 @@ class ClearedOverrideEvent:
     new_target: float
     override_duration_mins: Optional[int] = None
     
+    # Derived once at construction; used when logging
+    timestamp_epoch: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.timestamp_epoch = int(self.timestamp.timestamp())
+    
     def to_alert_message(self) -> str:
         """Format as a notification message."""
         import config
@@ -151,10 +195,50 @@ class OverrideDetector:
         self._previous_state: Optional[SystemState] = None
         self._override_start_times: dict[str, datetime] = {}  # zone_id -> when override started
         self._zone_schedules: dict[str, dict] = {}  # Cached schedules
+        self._parsed_schedules: dict[str, dict[int, tuple[list[time], list[float]]]] = {}
+        # zone_id -> (is_override, target_temp) from the previous poll
+        self._previous_keys: dict[str, tuple[bool, float]] = {}
     
     def set_zone_schedule(self, zone_id: str, schedule: dict):
         """Cache a zone's schedule for forensic analysis."""
+        if zone_id in self._parsed_schedules and self._zone_schedules.get(zone_id) == schedule:
+            return  # Unchanged since last refresh
         self._zone_schedules[zone_id] = schedule
+        self._parsed_schedules[zone_id] = self._parse_schedule(schedule) or _NO_SCHEDULE
+    
+    def set_all_zone_schedules(self, schedules: dict[str, dict]):
+        """Cache the schedules for several zones at once."""
+        for zone_id, schedule in schedules.items():
+            self.set_zone_schedule(zone_id, schedule)
+    
+    def _parse_schedule(self, schedule: dict) -> dict[int, tuple[list[time], list[float]]]:
+        """
+        Pre-parse a schedule into weekday -> (sorted times, matching setpoints).
+        
+        Done once per schedule refresh so classification never has to
+        strptime switchpoints on the detection path.
+        """
+        parsed = {}
+        if not schedule:
+            return parsed
+        
+        for ds in schedule.get("DailySchedules", []):
+            # A malformed day (unknown DayOfWeek, bad switchpoint) is skipped
+            # on its own; the rest of the week still gives schedule context
+            try:
+                weekday = _DAY_NAMES.index(ds.get("DayOfWeek"))
+                points = sorted(
+                    (datetime.strptime(sp["TimeOfDay"], "%H:%M:%S").time(), sp["heatSetpoint"])
+                    for sp in ds.get("Switchpoints", [])
+                )
+            except Exception as e:
+                logger.error(f"Error parsing schedule day, skipping it: {e}")
+                continue
+            if points:
+                times, temps = zip(*points)
+                parsed[weekday] = (list(times), list(temps))
+        
+        return parsed
     
     def compare(self, new_state: SystemState) -> tuple[list[OverrideEvent], list[ClearedOverrideEvent]]:
         """
@@ -166,25 +250,41 @@ class OverrideDetector:
         new_overrides = []
         cleared_overrides = []
         
+        # Only override mode and setpoint matter for detection, so snapshot
+        # them as one tuple per zone and skip zones whose tuple is unchanged
+        new_zones = new_state.zones
+        new_keys = {
+            zone_id: (zone.is_override, zone.target_temp)
+            for zone_id, zone in new_zones.items()
+        }
+        previous_keys = self._previous_keys
+        
         if self._previous_state is None:
             # First run - just record overrides that are already active
-            for zone_id, zone in new_state.zones.items():
+            for zone_id, zone in new_zones.items():
                 if zone.is_override:
                     self._override_start_times[zone_id] = new_state.timestamp
                     logger.info(f"Zone {zone.name} already in override mode at startup")
             self._previous_state = new_state
+            self._previous_keys = new_keys
             return new_overrides, cleared_overrides
         
-        # Compare each zone
-        for zone_id, new_zone in new_state.zones.items():
-            prev_zone = self._previous_state.zones.get(zone_id)
+        # Compare each changed zone
+        for zone_id, key in new_keys.items():
+            previous_key = previous_keys.get(zone_id)
+            if key == previous_key:
+                continue
+            
+            new_zone = new_zones[zone_id]
             
-            if prev_zone is None:
+            if previous_key is None:
                 # New zone appeared
                 if new_zone.is_override:
                     self._override_start_times[zone_id] = new_state.timestamp
                 continue
             
+            prev_zone = self._previous_state.zones[zone_id]
+            
             # Detect override START
             if new_zone.is_override and not prev_zone.is_override:
                 self._override_start_times[zone_id] = new_state.timestamp
@@ -225,7 +325,11 @@ class OverrideDetector:
                         f"{prev_zone.target_temp}°C → {new_zone.target_temp}°C"
                     )
         
+        # Recorded together and only once every zone is handled: if the loop
+        # raises, the next poll compares against the same state again and the
+        # transitions are detected then rather than lost
         self._previous_state = new_state
+        self._previous_keys = new_keys
         return new_overrides, cleared_overrides
     
     def _create_override_event(
@@ -237,8 +341,12 @@ class OverrideDetector:
         """Create an OverrideEvent with classification."""
         
         # Get schedule context if available
-        schedule = self._zone_schedules.get(new_zone.zone_id, {})
-        scheduled_target, next_change, next_temp = self._get_schedule_context(schedule, timestamp)
+        if self._parsed_schedules.get(new_zone.zone_id, _NO_SCHEDULE) is _NO_SCHEDULE:
+            scheduled_target, next_change, next_temp = None, None, None
+        else:
+            scheduled_target, next_change, next_temp = self._get_schedule_context(
+                new_zone.zone_id, timestamp
+            )
         
         minutes_to_next = None
         if next_change:
@@ -256,12 +364,7 @@ class OverrideDetector:
         # Determine if suspicious
         is_suspicious = (
             new_zone.target_temp in config.SUSPICIOUS_TEMPS or
-            override_type in (
-                OverrideType.FIRMWARE_35C_BUG,
-                OverrideType.FIRMWARE_5C_BUG,
-                OverrideType.PRE_SCHEDULE_DROP,
-                OverrideType.COMMS_LOSS
-            )
+            override_type in _SUSPICIOUS_TYPES
         )
         
         return OverrideEvent(
@@ -299,116 +402,84 @@ class OverrideDetector:
         Returns:
             Tuple of (OverrideType, confidence 0-1, diagnostic notes)
         """
-        notes = []
-        
-        # Pattern 1: The 35°C firmware bug
-        if new_zone.target_temp == 35.0:
-            notes.append("Target is 35°C - known firmware bug value")
-            return OverrideType.FIRMWARE_35C_BUG, 0.9, "; ".join(notes)
+        target = new_zone.target_temp
         
-        # Pattern 2: The 5°C firmware bug  
-        if new_zone.target_temp == 5.0:
-            notes.append("Target is 5°C - possible firmware bug or comms loss")
-            return OverrideType.FIRMWARE_5C_BUG, 0.7, "; ".join(notes)
+        # Patterns 1 & 2: The 35°C and 5°C firmware bugs
+        firmware_match = _FIRMWARE_TEMPS.get(target)
+        if firmware_match is not None:
+            return firmware_match
         
         # Pattern 3: Pre-schedule drop (override just before temp decrease)
         if (minutes_to_next is not None and 
             next_temp is not None and
-            minutes_to_next <= config.PRE_SCHEDULE_DROP_WINDOW_MINS and
+            minutes_to_next <= _PRE_SCHEDULE_DROP_WINDOW_MINS and
             next_temp < prev_zone.target_temp):
-            notes.append(
+            return OverrideType.PRE_SCHEDULE_DROP, 0.8, (
                 f"Override occurred {minutes_to_next}min before scheduled drop "
                 f"({prev_zone.target_temp}°C → {next_temp}°C)"
             )
-            return OverrideType.PRE_SCHEDULE_DROP, 0.8, "; ".join(notes)
         
         # Pattern 4: 0.5°C threshold stuck
         if (scheduled_target is not None and
-            abs(new_zone.target_temp - scheduled_target) <= config.TEMP_THRESHOLD_WARNING):
-            notes.append(
-                f"Target within 0.5°C of schedule ({new_zone.target_temp}°C vs {scheduled_target}°C) - "
+            abs(target - scheduled_target) <= _TEMP_THRESHOLD_WARNING):
+            return OverrideType.THRESHOLD_STUCK, 0.6, (
+                f"Target within 0.5°C of schedule ({target}°C vs {scheduled_target}°C) - "
                 f"possible threshold bug"
             )
-            return OverrideType.THRESHOLD_STUCK, 0.6, "; ".join(notes)
         
         # Pattern 5: Communication loss (zone not available)
         if not new_zone.is_available:
-            notes.append("Zone reporting unavailable - possible RF communication loss")
-            return OverrideType.COMMS_LOSS, 0.8, "; ".join(notes)
+            return OverrideType.COMMS_LOSS, 0.8, "Zone reporting unavailable - possible RF communication loss"
         
         # Pattern 6: Could be legitimate user override
         # Check if it's a "reasonable" temperature change
-        if 15.0 <= new_zone.target_temp <= 25.0:
-            notes.append("Temperature in normal range - may be legitimate user override")
-            return OverrideType.USER_MANUAL, 0.5, "; ".join(notes)
+        if 15.0 <= target <= 25.0:
+            return OverrideType.USER_MANUAL, 0.5, "Temperature in normal range - may be legitimate user override"
         
         # Unknown
-        notes.append("No matching pattern identified")
-        return OverrideType.UNKNOWN, 0.3, "; ".join(notes)
+        return OverrideType.UNKNOWN, 0.3, "No matching pattern identified"
     
     def _get_schedule_context(
         self, 
-        schedule: dict, 
+        zone_id: str, 
         now: datetime
     ) -> tuple[Optional[float], Optional[datetime], Optional[float]]:
         """
-        Parse schedule to determine what should be happening now.
+        Use the zone's parsed schedule to determine what should be happening now.
         
         Returns:
             Tuple of (current_scheduled_temp, next_change_time, next_temp)
         """
-        if not schedule:
+        parsed = self._parsed_schedules.get(zone_id)
+        if not parsed:
             return None, None, None
         
-        try:
-            # Evohome schedules are structured by day
-            day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            today_name = day_names[now.weekday()]
-            tomorrow_name = day_names[(now.weekday() + 1) % 7]
-            
-            daily_schedules = schedule.get("DailySchedules", [])
-            
-            today_schedule = None
-            tomorrow_schedule = None
-            for ds in daily_schedules:
-                if ds.get("DayOfWeek") == today_name:
-                    today_schedule = ds.get("Switchpoints", [])
-                if ds.get("DayOfWeek") == tomorrow_name:
-                    tomorrow_schedule = ds.get("Switchpoints", [])
-            
-            if not today_schedule:
-                return None, None, None
-            
-            current_time = now.time()
-            current_temp = None
+        weekday = now.weekday()
+        today_schedule = parsed.get(weekday)
+        tomorrow_schedule = parsed.get((weekday + 1) % 7)
+        
+        if not today_schedule:
+            return None, None, None
+        
+        times, temps = today_schedule
+        
+        # Last switchpoint at or before now is the active one
+        idx = bisect.bisect_right(times, now.time()) - 1
+        current_temp = temps[idx] if idx >= 0 else None
+        
+        if idx + 1 < len(times):
+            next_change = datetime.combine(now.date(), times[idx + 1])
+            next_temp = temps[idx + 1]
+        elif tomorrow_schedule:
+            # No next switchpoint today, use tomorrow's first
+            tomorrow_times, tomorrow_temps = tomorrow_schedule
+            next_change = datetime.combine(now.date() + timedelta(days=1), tomorrow_times[0])
+            next_temp = tomorrow_temps[0]
+        else:
             next_change = None
             next_temp = None
-            
-            # Find current period and next switchpoint
-            for i, sp in enumerate(today_schedule):
-                sp_time = datetime.strptime(sp["TimeOfDay"], "%H:%M:%S").time()
-                sp_temp = sp["heatSetpoint"]
-                
-                if sp_time <= current_time:
-                    current_temp = sp_temp
-                else:
-                    # This is the next switchpoint
-                    next_change = datetime.combine(now.date(), sp_time)
-                    next_temp = sp_temp
-                    break
-            
-            # If no next switchpoint today, use tomorrow's first
-            if next_change is None and tomorrow_schedule:
-                sp = tomorrow_schedule[0]
-                sp_time = datetime.strptime(sp["TimeOfDay"], "%H:%M:%S").time()
-                next_change = datetime.combine(now.date() + timedelta(days=1), sp_time)
-                next_temp = sp["heatSetpoint"]
-            
-            return current_temp, next_change, next_temp
-            
-        except Exception as e:
-            logger.error(f"Error parsing schedule: {e}")
-            return None, None, None
+        
+        return current_temp, next_change, next_temp
     
     def get_current_overrides(self) -> dict[str, datetime]:
         """Return dict of zone_id -> when override started for active overrides."""
@@ -0,0 +1,32 @@
+"""
+Evohome HR92 Monitor - JSON Helpers
+
+Serialization shared by the logger, web UI, notifier and CLI, using orjson
+when it is installed and the stdlib json module otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (indented by two spaces if asked)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+
+def dumps_str(obj, indent: bool = False) -> str:
+    """Serialize to a JSON string (see dumps)."""
+    return dumps(obj, indent).decode()
+
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
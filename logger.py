@@ -5,20 +5,111 @@ Stores all state changes and override events in SQLite for later analysis.
 """
 
 import sqlite3
+import functools
 import logging
-import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 from contextlib import contextmanager
 
 from poller import SystemState, ZoneState
 from detector import OverrideEvent, ClearedOverrideEvent, OverrideType
 import config
+import jsonutil
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=64)
+def _multi_row_insert(sql: str, row_count: int, column_count: int) -> str:
+    """Unroll a single-row "INSERT ... VALUES (?, ...)" into row_count rows."""
+    head = sql[:sql.rindex("VALUES")]
+    row = "(" + ", ".join("?" * column_count) + ")"
+    return head + "VALUES " + ", ".join([row] * row_count)
+
+
+def _column_names(cursor: sqlite3.Cursor) -> list[str]:
+    """Column names of a cursor's current result set."""
+    return [d[0] for d in cursor.description]
+
+
+# Read-query results are cached in memory until the next write to
+# override_events, or for at most this long so rolling windows advance
+_QUERY_CACHE_TTL_SECONDS = 60
+_QUERY_CACHE_MAX_ENTRIES = 128
+
+# Identical consecutive state snapshots are skipped, but one is still
+# written at least this often as a liveness heartbeat
+_SNAPSHOT_HEARTBEAT_SECONDS = 600
+
+# Rows removed per retention DELETE, so each transaction (and WAL growth)
+# stays small and other work can take the connection in between
+_CLEANUP_BATCH_SIZE = 10000
+
+# Most queued log writes committed in one writer transaction
+_WRITE_BATCH_MAX = 500
+
+# Bound-parameter budget per multi-row INSERT (SQLite's historical
+# SQLITE_MAX_VARIABLE_NUMBER) and a cap on rows per statement
+_MAX_SQL_VARIABLES = 999
+_MAX_ROWS_PER_INSERT = 250
+
+# Rows fetched per lock acquisition when streaming query results
+_ITER_BATCH_SIZE = 500
+
+# Timestamps are stored as INTEGER unix seconds and handed back to callers
+# as local ISO-8601 strings. Queries selecting this must qualify the column
+# (table.timestamp) in WHERE/ORDER BY, or SQLite binds the alias instead.
+_ISO_TIMESTAMP = "strftime('%Y-%m-%dT%H:%M:%S', timestamp, 'unixepoch', 'localtime') AS timestamp"
+
+# Tables whose timestamp column was TEXT (ISO strings) before the switch
+_TIMESTAMPED_TABLES = ("state_snapshots", "zone_history", "override_events")
+
+# Explicit SELECT column lists (schema order, same keys as SELECT *)
+_EVENT_COLUMNS = f"""
+    id, {_ISO_TIMESTAMP}, zone_id, zone_name, event_type, previous_mode, new_mode,
+    previous_target, new_target, current_temp, override_type, confidence,
+    scheduled_target, next_schedule_change, next_scheduled_temp,
+    minutes_to_next_change, temp_delta_from_schedule, is_suspicious,
+    diagnostic_notes, duration_mins, created_at
+"""
+_ZONE_HISTORY_COLUMNS = f"""
+    id, {_ISO_TIMESTAMP}, zone_id, zone_name, current_temp, target_temp,
+    setpoint_mode, is_available, created_at
+"""
+
+_SQL_INSERT_SNAPSHOT = """
+    INSERT INTO state_snapshots (timestamp, system_mode, zones_json)
+    VALUES (?, ?, ?)
+"""
+
+_SQL_INSERT_ZONE_STATE = """
+    INSERT INTO zone_history 
+    (timestamp, zone_id, zone_name, current_temp, target_temp, setpoint_mode, is_available)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_CLEARED = """
+    INSERT INTO override_events 
+    (timestamp, zone_id, zone_name, event_type, previous_mode, new_mode,
+     previous_target, new_target, duration_mins)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_EVENT = """
+    INSERT INTO override_events 
+    (timestamp, zone_id, zone_name, event_type, previous_mode, new_mode,
+     previous_target, new_target, current_temp, override_type, confidence,
+     scheduled_target, next_schedule_change, next_scheduled_temp,
+     minutes_to_next_change, temp_delta_from_schedule, is_suspicious,
+     diagnostic_notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class ForensicLogger:
     """
     SQLite-based forensic logging for Evohome state and events.
@@ -27,18 +118,94 @@ class ForensicLogger:
     def __init__(self, db_path: Path = None):
         self.db_path = db_path or config.DATABASE_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection for the lifetime of the logger, so the page cache
+        # and sqlite3's statement cache survive between calls. The web
+        # dashboard queries from worker threads, so access is serialized.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        self._configure_connection(self._conn)
+
+        # zone_id -> (current_temp, target_temp, mode, available) last logged
+        # to zone_history, so each poll only records zones that changed.
+        # Updated when rows are queued; the writer resets it if a batch fails.
+        self._last_zone_states: dict[str, tuple] = {}
+
+        # zones_json of the last snapshot written, and when (monotonic)
+        self._last_snapshot_json: Optional[str] = None
+        self._last_snapshot_time = 0.0
+
+        # (query name, *args) -> (monotonic time cached, rows)
+        self._query_cache: dict[tuple, tuple[float, list[dict]]] = {}
+
         self._init_database()
+
+        # Id of the newest committed override event, kept in memory so the
+        # web handlers can read it on the event loop without waiting on the
+        # connection lock (held by the writer, cleanup and checkpoints).
+        # Only the writer thread updates it, after each commit.
+        with self._get_connection() as conn:
+            self._last_event_id: int = conn.execute(
+                "SELECT MAX(id) FROM override_events"
+            ).fetchone()[0] or 0
+
+        # Writes are queued and committed by a background thread so callers
+        # on the asyncio loop never block on SQLite or disk syncs
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="forensic-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """
+        Apply performance pragmas to a new connection.
+
+        journal_mode=WAL is persistent in the database file; the rest are
+        per-connection and must be applied to every connection opened.
+        """
+        # Let cleanup reclaim free pages incrementally instead of with a full
+        # VACUUM. Must precede journal_mode, which writes the file header;
+        # only takes effect on a new database (existing ones: vacuum()).
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; fsync only at checkpoints
+        conn.execute("PRAGMA cache_size=-64000")  # ~64MB page cache
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")  # Wait on a locked database instead of failing
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256MB
+    
+    def _legacy_timestamp_tables(self, cursor: sqlite3.Cursor) -> list[str]:
+        """Tables that still store timestamps as ISO TEXT and need migrating."""
+        legacy = []
+        for table in _TIMESTAMPED_TABLES:
+            for column in cursor.execute(f"PRAGMA table_info({table})").fetchall():
+                if column[1] == "timestamp" and column[2].upper() == "TEXT":
+                    legacy.append(table)
+        return legacy
     
     def _init_database(self):
         """Initialize the database schema."""
-        with self._get_connection() as conn:
+        with self._transaction() as conn:
             cursor = conn.cursor()
             
+            # Databases created before timestamps were INTEGER: move the old
+            # tables aside, recreate them below and copy the rows across
+            legacy_tables = self._legacy_timestamp_tables(cursor)
+            for table in legacy_tables:
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+            
             # Table for periodic state snapshots
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS state_snapshots (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     system_mode TEXT,
                     zones_json TEXT NOT NULL,
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
@@ -49,7 +216,7 @@ class ForensicLogger:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS zone_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     zone_id TEXT NOT NULL,
                     zone_name TEXT NOT NULL,
                     current_temp REAL,
@@ -64,7 +231,7 @@ class ForensicLogger:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS override_events (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     zone_id TEXT NOT NULL,
                     zone_name TEXT NOT NULL,
                     event_type TEXT NOT NULL,
@@ -87,6 +254,18 @@ class ForensicLogger:
                 )
             """)
             
+            for table in legacy_tables:
+                cursor.execute(f"INSERT INTO {table} SELECT * FROM {table}_legacy")
+                # Stored ISO strings are naive local time
+                cursor.execute(f"""
+                    UPDATE {table}
+                    SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                    WHERE typeof(timestamp) = 'text'
+                """)
+                cursor.execute(f"DROP TABLE {table}_legacy")
+            if legacy_tables:
+                logger.info(f"Migrated timestamps to unix epoch in: {', '.join(legacy_tables)}")
+            
             # Indexes for common queries
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_zone_history_zone 
@@ -105,21 +284,161 @@ class ForensicLogger:
                 ON state_snapshots(timestamp)
             """)
             
-            conn.commit()
+            # Dashboard aggregations only look at override starts in a window.
+            # Led by the window, then every column the per-zone counts read, so
+            # that query is answered from the index alone (event_type is fixed
+            # by the WHERE clause but SQLite only treats the index as covering
+            # if it holds the column). Replaces an earlier event_type-led index.
+            cursor.execute("DROP INDEX IF EXISTS idx_override_events_start_time")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_override_events_start_zone 
+                ON override_events(timestamp, zone_id, zone_name, is_suspicious, event_type)
+                WHERE event_type = 'override_start'
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_override_events_suspicious 
+                ON override_events(timestamp)
+                WHERE is_suspicious = 1
+            """)
+            # Time-window event listings and retention cleanup
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_override_events_time 
+                ON override_events(timestamp)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_zone_history_time 
+                ON zone_history(timestamp)
+            """)
+            
+            # Gather planner statistics once; later runs refresh them via
+            # PRAGMA optimize on close()
+            has_stats = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if not has_stats or legacy_tables:
+                cursor.execute("ANALYZE")
+            
             logger.info(f"Database initialized at {self.db_path}")
     
     @contextmanager
     def _get_connection(self):
-        """Get a database connection."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
+        """Get the shared database connection, holding the connection lock."""
+        with self._lock:
+            yield self._conn
+    
+    def close(self):
+        """Flush queued writes, stop the writer thread and close the database."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+        logger.debug("Database connection closed")
+    
+    # =========================================================================
+    # BACKGROUND WRITER
+    # =========================================================================
+    
+    def _enqueue(self, writes: list[tuple[str, list[tuple]]], touches_events: bool = False):
+        """
+        Queue (sql, rows) writes to be committed together by the writer thread.
+        
+        touches_events marks writes to override_events, whose commit must
+        invalidate the query cache.
+        """
+        self._queue.put((writes, touches_events))
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every write queued so far has been committed."""
+        if not self._writer.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def _writer_loop(self):
+        """Drain the write queue, committing each batch in one transaction."""
+        while True:
+            items = [self._queue.get()]
+            while len(items) < _WRITE_BATCH_MAX:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = False
+            try:
+                self._write_batch([item for item in items if isinstance(item, tuple)])
+            finally:
+                # Flush waiters and the stop marker are honoured even if the
+                # batch blew up, so neither can hang
+                for item in items:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        item.set()
+            if stop:
+                return
+    
+    def _write_batch(self, batch: list[tuple[list[tuple[str, list[tuple]]], bool]]):
+        """Commit a batch of queued writes."""
+        if not batch:
+            return
+        
+        # Group rows by statement so each table gets unrolled multi-row
+        # INSERTs; rows of one kind keep their queued order
+        rows_by_sql: dict[str, list[tuple]] = {}
+        for writes, _ in batch:
+            for sql, rows in writes:
+                rows_by_sql.setdefault(sql, []).extend(rows)
+        
+        touches_events = any(touches for _, touches in batch)
         try:
-            yield conn
-        finally:
-            conn.close()
+            with self._transaction() as conn:
+                for sql, rows in rows_by_sql.items():
+                    self._insert_rows(conn, sql, rows)
+                # Invalidate while still holding the connection lock, so no
+                # reader can cache pre-commit results after this point
+                if touches_events:
+                    self._query_cache.clear()
+                    newest_event_id = conn.execute(
+                        "SELECT MAX(id) FROM override_events"
+                    ).fetchone()[0] or 0
+            # Published only once committed, so readers never see an id
+            # whose row they can't query yet
+            if touches_events:
+                self._last_event_id = newest_event_id
+        except Exception:
+            # Anything (a bad row as much as a locked database) drops just this
+            # batch; letting it escape would silently kill the writer thread
+            logger.exception(f"Failed to write {len(batch)} queued log entries")
+            # The de-dup state already assumes these rows were stored; forget
+            # it so the next poll writes a full snapshot and every zone again
+            self._last_zone_states.clear()
+            self._last_snapshot_json = None
     
-    def log_state_snapshot(self, state: SystemState):
-        """Log a complete system state snapshot."""
+    def _insert_rows(self, conn: sqlite3.Connection, sql: str, rows: list[tuple]):
+        """Insert rows using as few multi-row INSERT statements as possible."""
+        if len(rows) == 1:
+            conn.execute(sql, rows[0])
+            return
+        
+        column_count = len(rows[0])
+        chunk = min(_MAX_ROWS_PER_INSERT, _MAX_SQL_VARIABLES // column_count)
+        for start in range(0, len(rows), chunk):
+            part = rows[start:start + chunk]
+            conn.execute(
+                _multi_row_insert(sql, len(part), column_count),
+                [value for row in part for value in row]
+            )
+    
+    # =========================================================================
+    # LOGGING METHODS (queued; committed by the writer thread)
+    # =========================================================================
+    
+    def _snapshot_row(self, state: SystemState, timestamp: int) -> tuple:
+        """Build the state_snapshots INSERT parameters for a state (epoch timestamp)."""
         zones_data = {
             zone_id: {
                 "name": zone.name,
@@ -131,172 +450,419 @@ class ForensicLogger:
             }
             for zone_id, zone in state.zones.items()
         }
+        return (timestamp, state.system_mode, jsonutil.dumps_str(zones_data))
+    
+    def _zone_row(self, zone: ZoneState, timestamp: int) -> tuple:
+        """Build the zone_history INSERT parameters for a zone (epoch timestamp)."""
+        return (
+            timestamp,
+            zone.zone_id,
+            zone.name,
+            zone.current_temp,
+            zone.target_temp,
+            zone.setpoint_mode,
+            1 if zone.is_available else 0
+        )
+    
+    def _changed_snapshot_row(self, state: SystemState, timestamp: int) -> Optional[tuple]:
+        """
+        Build a snapshot row, or None if it would repeat the previous one.
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO state_snapshots (timestamp, system_mode, zones_json)
-                VALUES (?, ?, ?)
-            """, (
-                state.timestamp.isoformat(),
-                state.system_mode,
-                json.dumps(zones_data)
-            ))
-            conn.commit()
-    
-    def log_zone_state(self, zone: ZoneState, timestamp: datetime = None):
+        Unchanged snapshots are still written every
+        _SNAPSHOT_HEARTBEAT_SECONDS so gaps in the data mean the monitor
+        was down, not that nothing changed.
+        """
+        row = self._snapshot_row(state, timestamp)
+        now = time.monotonic()
+        if (row[2] == self._last_snapshot_json
+                and now - self._last_snapshot_time < _SNAPSHOT_HEARTBEAT_SECONDS):
+            return None
+        self._last_snapshot_json = row[2]
+        self._last_snapshot_time = now
+        return row
+    
+    def log_state_snapshot(self, state: SystemState):
+        """Log a complete system state snapshot (skipped if unchanged)."""
+        row = self._changed_snapshot_row(state, int(state.timestamp.timestamp()))
+        if row is not None:
+            self._enqueue([(_SQL_INSERT_SNAPSHOT, [row])])
+    
+    def log_zone_state(self, zone: ZoneState, timestamp: datetime):
         """Log a single zone's state."""
-        timestamp = timestamp or datetime.now()
+        self._enqueue([(_SQL_INSERT_ZONE_STATE, [self._zone_row(zone, int(timestamp.timestamp()))])])
+    
+    def log_poll_cycle(
+        self,
+        state: SystemState,
+        new_overrides: list[OverrideEvent],
+        cleared_overrides: list[ClearedOverrideEvent]
+    ):
+        """
+        Log everything from one poll in a single transaction.
+        
+        Writes the state snapshot (if it changed or a heartbeat is due), a
+        zone_history row for each zone whose state changed since the
+        previous poll, and the poll's override start/cleared events.
+        """
+        # All rows from one poll share the poll's timestamp, converted once
+        timestamp = int(state.timestamp.timestamp())
+        
+        zone_rows = []
+        last_zone_states = self._last_zone_states
+        for zone in state.zones.values():
+            zone_state = (zone.current_temp, zone.target_temp, zone.setpoint_mode, zone.is_available)
+            if last_zone_states.get(zone.zone_id) != zone_state:
+                zone_rows.append(self._zone_row(zone, timestamp))
+                last_zone_states[zone.zone_id] = zone_state
+        
+        writes = []
+        snapshot_row = self._changed_snapshot_row(state, timestamp)
+        if snapshot_row is not None:
+            writes.append((_SQL_INSERT_SNAPSHOT, [snapshot_row]))
+        if zone_rows:
+            writes.append((_SQL_INSERT_ZONE_STATE, zone_rows))
+        if new_overrides:
+            writes.append((_SQL_INSERT_EVENT, [self._override_event_row(event) for event in new_overrides]))
+        if cleared_overrides:
+            writes.append((_SQL_INSERT_CLEARED, [self._cleared_event_row(event) for event in cleared_overrides]))
         
+        if writes:
+            self._enqueue(writes, touches_events=bool(new_overrides or cleared_overrides))
+        logger.debug(
+            f"Queued poll: {'1' if snapshot_row else 'no'} snapshot, {len(zone_rows)} zone changes, "
+            f"{len(new_overrides)} overrides, {len(cleared_overrides)} cleared"
+        )
+    
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in a single explicit transaction."""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO zone_history 
-                (timestamp, zone_id, zone_name, current_temp, target_temp, setpoint_mode, is_available)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                timestamp.isoformat(),
-                zone.zone_id,
-                zone.name,
-                zone.current_temp,
-                zone.target_temp,
-                zone.setpoint_mode,
-                1 if zone.is_available else 0
-            ))
-            conn.commit()
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    def _override_event_row(self, event: OverrideEvent) -> tuple:
+        """Build the override_events INSERT parameters for an event."""
+        return (
+            event.timestamp_epoch,
+            event.zone_id,
+            event.zone_name,
+            "override_start",
+            event.previous_mode,
+            event.new_mode,
+            event.previous_target,
+            event.new_target,
+            event.current_temp,
+            event.override_type.value,
+            event.confidence,
+            event.scheduled_target,
+            event.next_schedule_change_iso,
+            event.next_scheduled_temp,
+            event.minutes_to_next_change,
+            event.temp_delta_from_schedule,
+            1 if event.is_suspicious else 0,
+            event.diagnostic_notes
+        )
     
     def log_override_event(self, event: OverrideEvent):
         """Log an override event."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO override_events 
-                (timestamp, zone_id, zone_name, event_type, previous_mode, new_mode,
-                 previous_target, new_target, current_temp, override_type, confidence,
-                 scheduled_target, next_schedule_change, next_scheduled_temp,
-                 minutes_to_next_change, temp_delta_from_schedule, is_suspicious,
-                 diagnostic_notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                event.timestamp.isoformat(),
-                event.zone_id,
-                event.zone_name,
-                "override_start",
-                event.previous_mode,
-                event.new_mode,
-                event.previous_target,
-                event.new_target,
-                event.current_temp,
-                event.override_type.value,
-                event.confidence,
-                event.scheduled_target,
-                event.next_schedule_change.isoformat() if event.next_schedule_change else None,
-                event.next_scheduled_temp,
-                event.minutes_to_next_change,
-                event.temp_delta_from_schedule,
-                1 if event.is_suspicious else 0,
-                event.diagnostic_notes
-            ))
-            conn.commit()
-            logger.debug(f"Logged override event for {event.zone_name}")
+        self._enqueue([(_SQL_INSERT_EVENT, [self._override_event_row(event)])], touches_events=True)
+        logger.debug(f"Queued override event for {event.zone_name}")
+    
+    def log_override_events(self, events: list[OverrideEvent]):
+        """Log a batch of override events in one transaction."""
+        if not events:
+            return
+        
+        self._enqueue(
+            [(_SQL_INSERT_EVENT, [self._override_event_row(event) for event in events])],
+            touches_events=True
+        )
+        logger.debug(f"Queued {len(events)} override events")
+    
+    def _cleared_event_row(self, event: ClearedOverrideEvent) -> tuple:
+        """Build the override_events INSERT parameters for a cleared event."""
+        return (
+            event.timestamp_epoch,
+            event.zone_id,
+            event.zone_name,
+            "override_cleared",
+            event.previous_mode,
+            "FollowSchedule",
+            event.previous_target,
+            event.new_target,
+            event.override_duration_mins
+        )
     
     def log_override_cleared(self, event: ClearedOverrideEvent):
         """Log an override cleared event."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO override_events 
-                (timestamp, zone_id, zone_name, event_type, previous_mode, new_mode,
-                 previous_target, new_target, duration_mins)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                event.timestamp.isoformat(),
-                event.zone_id,
-                event.zone_name,
-                "override_cleared",
-                event.previous_mode,
-                "FollowSchedule",
-                event.previous_target,
-                event.new_target,
-                event.override_duration_mins
-            ))
-            conn.commit()
-            logger.debug(f"Logged override cleared for {event.zone_name}")
+        self._enqueue([(_SQL_INSERT_CLEARED, [self._cleared_event_row(event)])], touches_events=True)
+        logger.debug(f"Queued override cleared for {event.zone_name}")
     
     def cleanup_old_data(self, days: int = None):
         """Remove data older than specified days."""
         days = days or config.LOG_RETENTION_DAYS
         cutoff = datetime.now() - timedelta(days=days)
-        cutoff_str = cutoff.isoformat()
+        cutoff_ts = int(cutoff.timestamp())
+        
+        snapshots_deleted = self._delete_before("state_snapshots", cutoff_ts)
+        history_deleted = self._delete_before("zone_history", cutoff_ts)
+        events_deleted = self._delete_before("override_events", cutoff_ts)
         
+        # Daily refresh of planner statistics as row counts shift; cheap
+        # because SQLite only re-analyzes tables that have changed enough
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute("DELETE FROM state_snapshots WHERE timestamp < ?", (cutoff_str,))
-            snapshots_deleted = cursor.rowcount
-            
-            cursor.execute("DELETE FROM zone_history WHERE timestamp < ?", (cutoff_str,))
-            history_deleted = cursor.rowcount
-            
-            cursor.execute("DELETE FROM override_events WHERE timestamp < ?", (cutoff_str,))
-            events_deleted = cursor.rowcount
-            
-            conn.commit()
-            
-            if snapshots_deleted or history_deleted or events_deleted:
-                logger.info(
-                    f"Cleaned up old data: {snapshots_deleted} snapshots, "
-                    f"{history_deleted} history records, {events_deleted} events"
-                )
-            
-            # Vacuum to reclaim space
-            cursor.execute("VACUUM")
+            conn.execute("PRAGMA optimize")
+        
+        if not (snapshots_deleted or history_deleted or events_deleted):
+            return
+        
+        logger.info(
+            f"Cleaned up old data: {snapshots_deleted} snapshots, "
+            f"{history_deleted} history records, {events_deleted} events"
+        )
+        
+        with self._get_connection() as conn:
+            # Release some free pages and truncate the WAL without the global
+            # lock and full rewrite of VACUUM (see vacuum())
+            conn.execute("PRAGMA incremental_vacuum(1000)")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def _delete_before(self, table: str, cutoff_ts: int) -> int:
+        """Delete a table's rows older than cutoff_ts in bounded batches."""
+        # The stock sqlite3 build lacks DELETE ... LIMIT, so batch by rowid;
+        # the timestamp index keeps each batch's subquery a range scan
+        query = f"""
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table} WHERE timestamp < ?
+                ORDER BY timestamp LIMIT {_CLEANUP_BATCH_SIZE}
+            )
+        """
+        deleted = 0
+        while True:
+            with self._get_connection() as conn:
+                batch = conn.execute(query, (cutoff_ts,)).rowcount
+                if table == "override_events" and batch:
+                    self._query_cache.clear()
+            deleted += batch
+            if batch < _CLEANUP_BATCH_SIZE:
+                return deleted
+    
+    def vacuum(self):
+        """
+        Rebuild the database file to reclaim all free space.
+        
+        Locks and rewrites the whole database, so this is a manual
+        maintenance step (`cli.py vacuum`) rather than part of cleanup.
+        Also converts databases created before incremental auto-vacuum.
+        """
+        with self._get_connection() as conn:
+            # VACUUM cannot run inside a transaction, so never call it
+            # from within _transaction()
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logger.info(f"Vacuumed database at {self.db_path}")
     
     # =========================================================================
     # QUERY METHODS FOR FORENSIC ANALYSIS
     # =========================================================================
     
+    def _cached_rows(self, key: tuple, query: str, params) -> list[dict]:
+        """
+        Run a read query, serving repeats from the in-memory query cache.
+
+        Callers get their own copies of the row dicts, so they are free to
+        annotate them without corrupting the cache.
+        """
+        now = time.monotonic()
+        cached = self._query_cache.get(key)
+        if cached is not None and now - cached[0] < _QUERY_CACHE_TTL_SECONDS:
+            rows = cached[1]
+        else:
+            with self._get_connection() as conn:
+                cursor = conn.execute(query, params)
+                cols = _column_names(cursor)
+                rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+                if len(self._query_cache) >= _QUERY_CACHE_MAX_ENTRIES:
+                    self._query_cache.clear()
+                self._query_cache[key] = (now, rows)
+        return [row.copy() for row in rows]
+
+    def _iter_rows(self, query: str, params) -> Iterator[dict]:
+        """Yield a query's rows as dicts without materializing the result set."""
+        # Fetch in batches and release the lock in between, so a slow
+        # consumer (e.g. an export) never blocks the poller's writes
+        with self._get_connection() as conn:
+            cursor = conn.execute(query, params)
+            cols = _column_names(cursor)
+            rows = cursor.fetchmany(_ITER_BATCH_SIZE)
+        
+        while rows:
+            for row in rows:
+                yield dict(zip(cols, row))
+            with self._lock:
+                rows = cursor.fetchmany(_ITER_BATCH_SIZE)
+
+    def _build_event_filters(
+        self,
+        zone_id: str = None,
+        override_type: str = None,
+        days: int = 30,
+        suspicious_only: bool = False,
+        zone_name_like: Optional[str] = None
+    ) -> tuple[str, list]:
+        """Build the WHERE clause and parameters shared by event queries."""
+        cutoff = datetime.now() - timedelta(days=days)
+
+        # Qualified: a bare "timestamp" would resolve to the ISO string alias
+        # in queries that select _ISO_TIMESTAMP
+        where = "WHERE override_events.timestamp > ?"
+        params = [int(cutoff.timestamp())]
+
+        if zone_id:
+            where += " AND zone_id = ?"
+            params.append(zone_id)
+
+        if zone_name_like:
+            # Escape LIKE wildcards so the name matches as a literal substring
+            pattern = (
+                zone_name_like.lower()
+                .replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            where += " AND LOWER(zone_name) LIKE ? ESCAPE '\\'"
+            params.append(f"%{pattern}%")
+
+        if override_type:
+            where += " AND override_type = ?"
+            params.append(override_type)
+
+        if suspicious_only:
+            where += " AND is_suspicious = 1"
+
+        return where, params
+
+    def _build_event_query(
+        self,
+        zone_id: str = None,
+        override_type: str = None,
+        days: int = 30,
+        suspicious_only: bool = False,
+        zone_name_like: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> tuple[str, list]:
+        """Build the SELECT used by the override event queries."""
+        where, params = self._build_event_filters(
+            zone_id, override_type, days, suspicious_only, zone_name_like
+        )
+
+        query = f"SELECT {_EVENT_COLUMNS} FROM override_events {where} ORDER BY override_events.timestamp DESC"
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return query, params
+
+    def iter_override_events(
+        self,
+        zone_id: str = None,
+        override_type: str = None,
+        days: int = 30,
+        suspicious_only: bool = False,
+        zone_name_like: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[dict]:
+        """
+        Yield override events one at a time (newest first).
+
+        Takes the same filters as get_override_events but streams rows from
+        the cursor instead of materializing the full result set.
+        """
+        query, params = self._build_event_query(
+            zone_id, override_type, days, suspicious_only, zone_name_like, limit
+        )
+        return self._iter_rows(query, params)
+
     def get_override_events(
-        self, 
-        zone_id: str = None, 
+        self,
+        zone_id: str = None,
         override_type: str = None,
         days: int = 30,
-        suspicious_only: bool = False
+        suspicious_only: bool = False,
+        zone_name_like: Optional[str] = None,
+        limit: Optional[int] = None
     ) -> list[dict]:
         """
         Query override events with filters.
-        
+
         Args:
             zone_id: Filter by zone ID
             override_type: Filter by override type
             days: How many days back to query
             suspicious_only: Only return suspicious events
-        
+            zone_name_like: Case-insensitive substring match on zone name
+            limit: Maximum number of events to return (newest first)
+
         Returns:
             List of event dictionaries
         """
-        cutoff = datetime.now() - timedelta(days=days)
-        
-        query = "SELECT * FROM override_events WHERE timestamp > ?"
-        params = [cutoff.isoformat()]
-        
-        if zone_id:
-            query += " AND zone_id = ?"
-            params.append(zone_id)
-        
-        if override_type:
-            query += " AND override_type = ?"
-            params.append(override_type)
-        
-        if suspicious_only:
-            query += " AND is_suspicious = 1"
+        args = (zone_id, override_type, days, suspicious_only, zone_name_like, limit)
+        query, params = self._build_event_query(*args)
+        return self._cached_rows(("override_events",) + args, query, params)
+
+    def count_override_events(
+        self,
+        zone_id: str = None,
+        override_type: str = None,
+        days: int = 30,
+        suspicious_only: bool = False,
+        zone_name_like: Optional[str] = None
+    ) -> int:
+        """Count override events matching the same filters as get_override_events."""
+        where, params = self._build_event_filters(
+            zone_id, override_type, days, suspicious_only, zone_name_like
+        )
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM override_events {where}", params)
+            return cursor.fetchone()[0]
+    
+    def last_event_id(self) -> int:
+        """
+        Id of the newest override event (0 if none); changes whenever one is logged.
         
-        query += " ORDER BY timestamp DESC"
+        Served from memory without taking the connection lock, so it is safe
+        to call on the event loop.
+        """
+        return self._last_event_id
+    
+    def _window_version(self, table: str, cutoff: datetime) -> tuple:
+        """
+        (oldest, newest) row id in table newer than cutoff.
         
+        Rows are append-only and ids grow with time, so this changes exactly
+        when rows enter or age out of the window; callers use it to tell
+        whether a windowed query could return anything new.
+        """
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            return conn.execute(
+                f"SELECT MIN(id), MAX(id) FROM {table} WHERE timestamp > ?",
+                (int(cutoff.timestamp()),)
+            ).fetchone()
+    
+    def override_events_version(self, days: int = 30) -> tuple:
+        """Version of the override events in the last `days` (see _window_version)."""
+        return self._window_version("override_events", datetime.now() - timedelta(days=days))
+    
+    def zone_history_version(self, hours: int = 24) -> tuple:
+        """Version of the zone history in the last `hours` (see _window_version)."""
+        return self._window_version("zone_history", datetime.now() - timedelta(hours=hours))
     
     def get_zone_override_frequency(self, days: int = 30) -> list[dict]:
         """Get override frequency by zone."""
@@ -307,17 +873,15 @@ class ForensicLogger:
                 zone_id,
                 zone_name,
                 COUNT(*) as override_count,
-                SUM(CASE WHEN is_suspicious = 1 THEN 1 ELSE 0 END) as suspicious_count
+                SUM(CASE WHEN is_suspicious = 1 THEN 1 ELSE 0 END) as suspicious_count,
+                COUNT(*) * 100.0 / MAX(COUNT(*)) OVER () as percentage
             FROM override_events 
             WHERE timestamp > ? AND event_type = 'override_start'
             GROUP BY zone_id, zone_name
             ORDER BY override_count DESC
         """
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (cutoff.isoformat(),))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._cached_rows(("zone_frequency", days), query, (int(cutoff.timestamp()),))
     
     def get_override_time_distribution(self, days: int = 30) -> list[dict]:
         """Get override distribution by hour of day."""
@@ -325,18 +889,16 @@ class ForensicLogger:
         
         query = """
             SELECT 
-                CAST(strftime('%H', timestamp) AS INTEGER) as hour,
-                COUNT(*) as count
+                CAST(strftime('%H', timestamp, 'unixepoch', 'localtime') AS INTEGER) as hour,
+                COUNT(*) as count,
+                COUNT(*) * 100.0 / MAX(COUNT(*)) OVER () as percentage
             FROM override_events 
             WHERE timestamp > ? AND event_type = 'override_start'
             GROUP BY hour
             ORDER BY hour
         """
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (cutoff.isoformat(),))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._cached_rows(("time_distribution", days), query, (int(cutoff.timestamp()),))
     
     def get_override_type_distribution(self, days: int = 30) -> list[dict]:
         """Get distribution of override types."""
@@ -353,57 +915,64 @@ class ForensicLogger:
             ORDER BY count DESC
         """
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (cutoff.isoformat(),))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._cached_rows(("type_distribution", days), query, (int(cutoff.timestamp()),))
     
-    def get_zone_history(
+    def iter_zone_history(
         self, 
         zone_id: str, 
         hours: int = 24
-    ) -> list[dict]:
-        """Get recent history for a specific zone."""
+    ) -> Iterator[dict]:
+        """Yield recent history for a specific zone (newest first)."""
         cutoff = datetime.now() - timedelta(hours=hours)
         
-        query = """
-            SELECT * FROM zone_history 
-            WHERE zone_id = ? AND timestamp > ?
-            ORDER BY timestamp DESC
+        query = f"""
+            SELECT {_ZONE_HISTORY_COLUMNS} FROM zone_history 
+            WHERE zone_id = ? AND zone_history.timestamp > ?
+            ORDER BY zone_history.timestamp DESC
         """
-        
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (zone_id, cutoff.isoformat()))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._iter_rows(query, (zone_id, int(cutoff.timestamp())))
+    
+    def get_zone_history(
+        self, 
+        zone_id: str, 
+        hours: int = 24
+    ) -> list[dict]:
+        """Get recent history for a specific zone."""
+        return list(self.iter_zone_history(zone_id, hours))
     
     def get_recent_state_snapshots(self, hours: int = 24) -> list[dict]:
         """Get recent state snapshots."""
         cutoff = datetime.now() - timedelta(hours=hours)
         
-        query = """
-            SELECT * FROM state_snapshots 
-            WHERE timestamp > ?
-            ORDER BY timestamp DESC
+        query = f"""
+            SELECT id, {_ISO_TIMESTAMP}, system_mode, zones_json, created_at
+            FROM state_snapshots 
+            WHERE state_snapshots.timestamp > ?
+            ORDER BY state_snapshots.timestamp DESC
         """
         
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (cutoff.isoformat(),))
-            results = []
-            for row in cursor.fetchall():
-                d = dict(row)
-                d['zones'] = json.loads(d['zones_json'])
-                del d['zones_json']
-                results.append(d)
-            return results
+            rows = conn.execute(query, (int(cutoff.timestamp()),)).fetchall()
+        
+        return [
+            {
+                "id": row_id,
+                "timestamp": timestamp,
+                "system_mode": system_mode,
+                "created_at": created_at,
+                "zones": jsonutil.loads(zones_json),
+            }
+            for row_id, timestamp, system_mode, zones_json, created_at in rows
+        ]
     
     def get_diagnostics_summary(self, days: int = 30) -> dict:
         """Get a summary of diagnostics data for the dashboard."""
+        # Totals come from the per-zone counts rather than re-running the scan
+        zone_frequency = self.get_zone_override_frequency(days)
         return {
-            "zone_frequency": self.get_zone_override_frequency(days),
+            "zone_frequency": zone_frequency,
             "time_distribution": self.get_override_time_distribution(days),
             "type_distribution": self.get_override_type_distribution(days),
-            "total_overrides": sum(z["override_count"] for z in self.get_zone_override_frequency(days)),
-            "total_suspicious": sum(z["suspicious_count"] for z in self.get_zone_override_frequency(days)),
+            "total_overrides": sum(z["override_count"] for z in zone_frequency),
+            "total_suspicious": sum(z["suspicious_count"] for z in zone_frequency),
         }
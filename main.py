@@ -21,6 +21,11 @@ import threading
 from datetime import datetime, timedelta
 from typing import Optional
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 import config
 from poller import EvohomePoller, SystemState
 from detector import OverrideDetector
@@ -41,6 +46,13 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 logging.getLogger("uvicorn").setLevel(logging.WARNING)
 
+# Max schedule requests in flight at once (the Evohome API is rate limited)
+_SCHEDULE_FETCH_CONCURRENCY = 4
+
+# Longest a poll waits for its override events to be stored before pushing
+# the new state to dashboards
+_EVENT_FLUSH_TIMEOUT_SECONDS = 10
+
 
 class EvohomeMonitor:
     """
@@ -72,26 +84,23 @@ class EvohomeMonitor:
             self._consecutive_errors = 0
             self._last_poll = datetime.now()
             
-            # Update web dashboard state
-            web.set_current_state(state)
-            
-            # Log state snapshot (every poll)
-            self.forensic_logger.log_state_snapshot(state)
-            
             # Detect overrides
             new_overrides, cleared_overrides = self.detector.compare(state)
             
-            # Process new overrides
+            # Log snapshot, zone changes and events in one transaction
+            self.forensic_logger.log_poll_cycle(state, new_overrides, cleared_overrides)
+            if new_overrides or cleared_overrides:
+                # Dashboards reload to show new events once the pushed state
+                # carries their id, so wait (off the loop) until they're stored
+                await asyncio.to_thread(self.forensic_logger.flush, _EVENT_FLUSH_TIMEOUT_SECONDS)
+            
+            # Update web dashboard state
+            web.set_current_state(state)
+            
+            # Notify
             for event in new_overrides:
-                # Log to database
-                self.forensic_logger.log_override_event(event)
-                
-                # Send notification
                 self.notifier.notify_override(event)
-            
-            # Process cleared overrides
             for event in cleared_overrides:
-                self.forensic_logger.log_override_cleared(event)
                 self.notifier.notify_override_cleared(event)
             
             return state
@@ -109,14 +118,27 @@ class EvohomeMonitor:
     
     async def _fetch_schedules(self, state: SystemState):
         """Fetch and cache schedules for all zones (for forensic analysis)."""
-        for zone_id in state.zones:
-            try:
-                schedule = await self.poller.get_zone_schedule(zone_id)
-                if schedule:
-                    self.detector.set_zone_schedule(zone_id, schedule)
-                    logger.debug(f"Cached schedule for zone {zone_id}")
-            except Exception as e:
-                logger.warning(f"Could not fetch schedule for zone {zone_id}: {e}")
+        semaphore = asyncio.Semaphore(_SCHEDULE_FETCH_CONCURRENCY)
+        
+        async def fetch(zone_id: str) -> dict:
+            async with semaphore:
+                return await self.poller.get_zone_schedule(zone_id)
+        
+        zone_ids = list(state.zones)
+        results = await asyncio.gather(
+            *(fetch(zone_id) for zone_id in zone_ids),
+            return_exceptions=True
+        )
+        
+        schedules = {}
+        for zone_id, result in zip(zone_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not fetch schedule for zone {zone_id}: {result}")
+            elif result:
+                schedules[zone_id] = result
+        
+        self.detector.set_all_zone_schedules(schedules)
+        logger.debug(f"Cached schedules for {len(schedules)} zones")
     
     async def run(self):
         """Main run loop."""
@@ -129,8 +151,9 @@ class EvohomeMonitor:
         
         self._running = True
         
-        # Send startup notification
-        self.notifier.notify_startup()
+        # Send startup notification (in a thread: the event loop also
+        # serves the web dashboard and shouldn't wait on Telegram)
+        await asyncio.to_thread(self.notifier.notify_startup)
         
         # Initial poll
         state = await self._poll_once()
@@ -166,9 +189,10 @@ class EvohomeMonitor:
                     await self._fetch_schedules(state)
                     last_schedule_refresh = now
                 
-                # Cleanup old data daily
+                # Cleanup old data daily (off the loop: the deletes can take
+                # a while on a large database and would stall the web UI)
                 if (now - last_cleanup) > timedelta(days=1):
-                    self.forensic_logger.cleanup_old_data()
+                    await asyncio.to_thread(self.forensic_logger.cleanup_old_data)
                     last_cleanup = now
                 
             except asyncio.CancelledError:
@@ -179,8 +203,10 @@ class EvohomeMonitor:
         
         # Shutdown
         logger.info("Shutting down...")
-        self.notifier.notify_shutdown()
+        await asyncio.to_thread(self.notifier.notify_shutdown)
+        await asyncio.to_thread(self.notifier.close)
         await self.poller.close()
+        self.forensic_logger.close()
         logger.info("Shutdown complete")
     
     def stop(self):
@@ -234,7 +260,7 @@ def test_configuration():
     if config.TELEGRAM_ENABLED and config.TELEGRAM_BOT_TOKEN:
         notifier = NotificationManager()
         if notifier.telegram and notifier.telegram.is_configured:
-            if notifier.telegram.send("🧪 Test notification from Evohome Monitor", force=True):
+            if notifier.telegram.send("🧪 Test notification from Evohome Monitor"):
                 print("   ✓ Telegram notification sent")
             else:
                 print("   ✗ Failed to send Telegram notification")
@@ -284,6 +310,11 @@ def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # uvicorn only picks uvloop itself in uvicorn.run(); here the server shares
+    # our asyncio.run() loop, so select it before that loop is created
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     # Run
     if args.no_web:
         asyncio.run(monitor.run())
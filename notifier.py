@@ -4,29 +4,87 @@ Evohome HR92 Monitor - Notification System
 Sends alerts via Telegram (or other providers).
 """
 
+import functools
 import logging
+import queue
+import random
+import threading
+from collections import OrderedDict
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime
+from time import monotonic
 from typing import Optional
 
 import config
+from jsonutil import dumps
 
 logger = logging.getLogger(__name__)
 
+# (connect, read) timeouts for Telegram API requests
+_TELEGRAM_TIMEOUT = (3.05, 10)
+
+# Sent with request bodies pre-encoded by jsonutil.dumps
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Pending background sends; the oldest is dropped when this fills up
+_SEND_QUEUE_SIZE = 256
+
+# Zones with a remembered cooldown; well above any real installation, so only
+# ids that have disappeared (renamed/removed zones) are ever evicted
+_MAX_COOLDOWN_ZONES = 64
+
+# Static system message templates, filled in with str.format
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+_STARTUP_TEMPLATE = (
+    "🟢 <b>Evohome Monitor Started</b>\n\n"
+    "Time: {time}\n"
+    "Poll interval: {interval}s\n"
+    "Quiet hours: {quiet}"
+)
+_SHUTDOWN_TEMPLATE = "🔴 <b>Evohome Monitor Stopped</b>\n\nTime: {time}"
+_ERROR_TEMPLATE = "⚠️ <b>Evohome Monitor Error</b>\n\nTime: {time}\nError: {error}"
+
+
+class _JitteredRetry(Retry):
+    """Retry policy that adds up to 250ms of random jitter to each backoff."""
+    
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, 0.25) if backoff else backoff
+
+
+# Retry connection failures and transient Telegram errors (honouring
+# Retry-After on 429/503). Read errors are never retried: by then the message
+# may already have been delivered, and a retry would post it twice.
+_TELEGRAM_RETRY = _JitteredRetry(
+    total=3,
+    read=0,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset(["POST"]),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
 
 class TelegramNotifier:
     """Sends notifications via Telegram Bot API."""
     
-    def __init__(
-        self, 
-        bot_token: str = None, 
-        chat_id: str = None,
-        cooldown_seconds: int = None
-    ):
+    def __init__(self, bot_token: str = None, chat_id: str = None):
         self.bot_token = bot_token or config.TELEGRAM_BOT_TOKEN
         self.chat_id = chat_id or config.TELEGRAM_CHAT_ID
-        self.cooldown_seconds = cooldown_seconds or config.ALERT_COOLDOWN_SECONDS
-        self._last_alert_times: dict[str, datetime] = {}  # zone_id -> last alert time
+        self._url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        # Payload fields that are the same for every message
+        self._base_payload = {"chat_id": self.chat_id, "parse_mode": "HTML"}
+        
+        # Reuse keep-alive connections to the Bot API instead of a new
+        # TCP + TLS handshake per message
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, max_retries=_TELEGRAM_RETRY
+        ))
         
         if not self.bot_token or not self.chat_id:
             logger.warning("Telegram not configured - notifications disabled")
@@ -35,47 +93,15 @@ class TelegramNotifier:
     def is_configured(self) -> bool:
         return bool(self.bot_token and self.chat_id)
     
-    def _is_in_quiet_hours(self) -> bool:
-        """Check if we're in quiet hours."""
-        if not config.QUIET_HOURS_ENABLED:
-            return False
-        
-        now = datetime.now()
-        hour = now.hour
-        
-        start = config.QUIET_HOURS_START
-        end = config.QUIET_HOURS_END
-        
-        # Handle overnight quiet hours (e.g., 23:00 to 07:00)
-        if start > end:
-            return hour >= start or hour < end
-        else:
-            return start <= hour < end
-    
-    def _is_in_cooldown(self, zone_id: str) -> bool:
-        """Check if zone is in cooldown period."""
-        if zone_id not in self._last_alert_times:
-            return False
-        
-        last_alert = self._last_alert_times[zone_id]
-        cooldown_until = last_alert + timedelta(seconds=self.cooldown_seconds)
-        
-        return datetime.now() < cooldown_until
-    
-    def send(
-        self, 
-        message: str, 
-        zone_id: str = None,
-        force: bool = False,
-        silent: bool = False
-    ) -> bool:
+    def send(self, message: str, silent: bool = False) -> bool:
         """
         Send a notification via Telegram.
         
+        Quiet hours and cooldowns are decided by NotificationManager; this
+        only performs the delivery.
+        
         Args:
             message: The message to send
-            zone_id: Optional zone ID for cooldown tracking
-            force: Bypass cooldown and quiet hours
             silent: Send without notification sound
             
         Returns:
@@ -85,32 +111,15 @@ class TelegramNotifier:
             logger.debug("Telegram not configured, skipping notification")
             return False
         
-        # Check quiet hours
-        if not force and self._is_in_quiet_hours():
-            logger.info(f"In quiet hours, suppressing notification for {zone_id or 'system'}")
-            return False
-        
-        # Check cooldown
-        if not force and zone_id and self._is_in_cooldown(zone_id):
-            logger.info(f"Zone {zone_id} in cooldown, suppressing notification")
-            return False
-        
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-            payload = {
-                "chat_id": self.chat_id,
-                "text": message,
-                "parse_mode": "HTML",
-                "disable_notification": silent
-            }
+            payload = {**self._base_payload, "text": message, "disable_notification": silent}
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._session.post(
+                self._url, data=dumps(payload), headers=_JSON_HEADERS,
+                timeout=_TELEGRAM_TIMEOUT
+            )
             response.raise_for_status()
             
-            # Update cooldown tracker
-            if zone_id:
-                self._last_alert_times[zone_id] = datetime.now()
-            
             logger.info(f"Telegram notification sent successfully")
             return True
             
@@ -118,32 +127,30 @@ class TelegramNotifier:
             logger.error(f"Failed to send Telegram notification: {e}")
             return False
     
-    def send_startup_message(self) -> bool:
+    def close(self):
+        """Close pooled HTTP connections."""
+        self._session.close()
+    
+    def send_startup_message(self, timestamp: Optional[str] = None) -> bool:
         """Send a startup notification."""
-        message = (
-            "🟢 <b>Evohome Monitor Started</b>\n\n"
-            f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"Poll interval: {config.POLL_INTERVAL_SECONDS}s\n"
-            f"Quiet hours: {'enabled' if config.QUIET_HOURS_ENABLED else 'disabled'}"
+        message = _STARTUP_TEMPLATE.format(
+            time=timestamp or datetime.now().strftime(_TIME_FORMAT),
+            interval=config.POLL_INTERVAL_SECONDS,
+            quiet='enabled' if config.QUIET_HOURS_ENABLED else 'disabled'
         )
-        return self.send(message, force=True)
+        return self.send(message)
     
-    def send_shutdown_message(self) -> bool:
+    def send_shutdown_message(self, timestamp: Optional[str] = None) -> bool:
         """Send a shutdown notification."""
-        message = (
-            "🔴 <b>Evohome Monitor Stopped</b>\n\n"
-            f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        )
-        return self.send(message, force=True)
+        message = _SHUTDOWN_TEMPLATE.format(time=timestamp or datetime.now().strftime(_TIME_FORMAT))
+        return self.send(message)
     
-    def send_error_message(self, error: str) -> bool:
+    def send_error_message(self, error: str, timestamp: Optional[str] = None) -> bool:
         """Send an error notification."""
-        message = (
-            "⚠️ <b>Evohome Monitor Error</b>\n\n"
-            f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"Error: {error}"
+        message = _ERROR_TEMPLATE.format(
+            time=timestamp or datetime.now().strftime(_TIME_FORMAT), error=error
         )
-        return self.send(message, force=True, silent=True)
+        return self.send(message, silent=True)
 
 
 class NotificationManager:
@@ -152,18 +159,139 @@ class NotificationManager:
     Currently supports Telegram, extensible to others.
     """
     
-    def __init__(self):
+    def __init__(self, cooldown_seconds: int = None):
         self.telegram = TelegramNotifier() if config.TELEGRAM_ENABLED else None
         self._providers = []
+        self.cooldown_seconds = cooldown_seconds or config.ALERT_COOLDOWN_SECONDS
+        # zone_id -> monotonic time of last alert (immune to clock changes),
+        # least recently alerted first
+        self._last_alert_times: OrderedDict[str, float] = OrderedDict()
+        # (hour, start, end) -> quiet-hours answer for the most recent hour checked
+        self._quiet_cache: Optional[tuple[tuple[int, int, int], bool]] = None
         
         if self.telegram and self.telegram.is_configured:
             self._providers.append(self.telegram)
             logger.info("Telegram notifications enabled")
         else:
             logger.warning("No notification providers configured")
+        
+        # Sends triggered from the poll loop go through a worker thread, so
+        # a slow provider can't stall polling for its full request timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=_SEND_QUEUE_SIZE)
+        self._worker = threading.Thread(
+            target=self._send_worker, name="notification-sender", daemon=True
+        )
+        self._worker.start()
+    
+    def _send_worker(self):
+        """Deliver queued sends one at a time."""
+        while True:
+            send = self._queue.get()
+            try:
+                send()
+            except Exception as e:
+                logger.error(f"Notification send failed: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _enqueue(self, send):
+        """Queue a send for the worker, dropping the oldest if the queue is full."""
+        while True:
+            try:
+                self._queue.put_nowait(send)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    logger.warning("Notification queue full, dropped oldest pending message")
+                except queue.Empty:
+                    pass
+    
+    def _is_in_quiet_hours(self, now: datetime) -> bool:
+        """Check if we're in quiet hours."""
+        if not config.QUIET_HOURS_ENABLED:
+            return False
+        
+        hour = now.hour
+        
+        start = config.QUIET_HOURS_START
+        end = config.QUIET_HOURS_END
+        
+        # The answer only changes on the hour (or if the window is changed)
+        key = (hour, start, end)
+        if self._quiet_cache is not None and self._quiet_cache[0] == key:
+            return self._quiet_cache[1]
+        
+        # Handle overnight quiet hours (e.g., 23:00 to 07:00)
+        if start > end:
+            quiet = hour >= start or hour < end
+        else:
+            quiet = start <= hour < end
+        
+        self._quiet_cache = (key, quiet)
+        return quiet
+    
+    def _is_in_cooldown(self, zone_id: str) -> bool:
+        """Check if zone is in cooldown period."""
+        last_alert = self._last_alert_times.get(zone_id)
+        if last_alert is None:
+            return False
+        
+        return monotonic() - last_alert < self.cooldown_seconds
+    
+    def _is_suppressed(self, zone_id: str) -> bool:
+        """True (and logged) if quiet hours or the zone's cooldown block an alert."""
+        # Check quiet hours
+        if self._is_in_quiet_hours(datetime.now()):
+            logger.info(f"In quiet hours, suppressing notification for {zone_id}")
+            return True
+        
+        # Check cooldown
+        if self._is_in_cooldown(zone_id):
+            logger.info(f"Zone {zone_id} in cooldown, suppressing notification")
+            return True
+        
+        return False
+    
+    def _deliver_alert(self, message: str, zone_id: str, silent: bool = False) -> bool:
+        """
+        Deliver a zone alert to every provider, subject to quiet hours and
+        the per-zone cooldown. Runs on the worker thread, so the cooldown
+        check and update can't race between two alerts for the same zone.
+        """
+        # Checked again here: an earlier queued alert for the zone may have
+        # started its cooldown since this one was queued
+        if self._is_suppressed(zone_id):
+            return False
+        
+        delivered = False
+        for provider in self._providers:
+            if provider.send(message, silent=silent):
+                delivered = True
+        
+        # Update cooldown tracker
+        if delivered:
+            self._last_alert_times[zone_id] = monotonic()
+            self._last_alert_times.move_to_end(zone_id)
+            if len(self._last_alert_times) > _MAX_COOLDOWN_ZONES:
+                self._last_alert_times.popitem(last=False)
+        
+        return delivered
+    
+    def flush(self):
+        """Block until every queued notification has been delivered."""
+        self._queue.join()
     
     def notify_override(self, event) -> bool:
-        """Send an override notification."""
+        """
+        Queue an override notification for background delivery.
+        
+        Returns:
+            True if the alert was queued; False if no provider is configured
+            or the type filter, quiet hours or the zone's cooldown suppress
+            it. Delivery itself happens later, so this is not "sent".
+        """
         if not self._providers:
             return False
         
@@ -173,44 +301,56 @@ class NotificationManager:
                 logger.debug(f"Skipping notification - temp {event.new_target} not in suspicious list")
                 return False
         
-        message = event.to_alert_message()
-        success = False
-        
-        for provider in self._providers:
-            if provider.send(message, zone_id=event.zone_id):
-                success = True
+        if self._is_suppressed(event.zone_id):
+            return False
         
-        return success
+        message = event.to_alert_message()
+        self._enqueue(functools.partial(self._deliver_alert, message, event.zone_id))
+        return True
     
     def notify_override_cleared(self, event) -> bool:
-        """Send a notification that an override was cleared."""
-        if not self._providers:
+        """
+        Queue a notification that an override was cleared.
+        
+        Returns:
+            True if the alert was queued; False if no provider is configured
+            or quiet hours or the zone's cooldown suppress it (see
+            notify_override).
+        """
+        if not self._providers or self._is_suppressed(event.zone_id):
             return False
         
         message = event.to_alert_message()
-        success = False
-        
-        for provider in self._providers:
-            # Use silent notification for cleared events
-            if provider.send(message, zone_id=event.zone_id, silent=True):
-                success = True
-        
-        return success
+        # Use silent notification for cleared events
+        self._enqueue(functools.partial(self._deliver_alert, message, event.zone_id, silent=True))
+        return True
     
     def notify_startup(self) -> bool:
         """Send startup notifications."""
+        timestamp = datetime.now().strftime(_TIME_FORMAT)
         for provider in self._providers:
-            provider.send_startup_message()
+            provider.send_startup_message(timestamp)
         return bool(self._providers)
     
     def notify_shutdown(self) -> bool:
         """Send shutdown notifications."""
+        # Deliver anything still queued before the final message
+        self.flush()
+        timestamp = datetime.now().strftime(_TIME_FORMAT)
         for provider in self._providers:
-            provider.send_shutdown_message()
+            provider.send_shutdown_message(timestamp)
         return bool(self._providers)
     
     def notify_error(self, error: str) -> bool:
         """Send error notifications."""
+        # Stamped when the error is raised, not when the worker delivers it
+        timestamp = datetime.now().strftime(_TIME_FORMAT)
         for provider in self._providers:
-            provider.send_error_message(error)
+            self._enqueue(functools.partial(provider.send_error_message, error, timestamp))
         return bool(self._providers)
+    
+    def close(self):
+        """Deliver queued notifications, then release provider resources."""
+        self.flush()
+        for provider in self._providers:
+            provider.close()
@@ -5,10 +5,15 @@ Handles communication with the Evohome/Total Connect Comfort API
 using the evohomeclient2 library.
 """
 
+import asyncio
+import functools
 import logging
+import sys
 from datetime import datetime
 from dataclasses import dataclass, field
+from time import monotonic
 from typing import Optional
+import aiohttp
 from evohomeasync2 import EvohomeClient
 try:
     from evohomeasync2 import EvohomeClientOld
@@ -20,8 +25,35 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Minimum gap between login attempts, so a flapping backend can't trigger
+# a burst of (slow, rate-limited) re-authentications
+_MIN_LOGIN_INTERVAL_SECONDS = 60
 
-@dataclass
+
+def _is_transient_error(error: Exception) -> bool:
+    """True for network/server hiccups that don't invalidate the session."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status not in (401, 403)
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+
+def _intern(value):
+    """Intern API strings that repeat on every poll; pass anything else through."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_until(until_str: Optional[str]) -> Optional[datetime]:
+    """Parse an override's 'until' time; the same value repeats across polls."""
+    if not until_str:
+        return None
+    try:
+        return datetime.fromisoformat(until_str.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+
+
+@dataclass(slots=True)
 class ZoneState:
     """Represents the current state of a single zone/HR92."""
     zone_id: str
@@ -47,7 +79,7 @@ class ZoneState:
         return self.setpoint_mode == "PermanentOverride"
 
 
-@dataclass
+@dataclass(slots=True)
 class SystemState:
     """Represents the full system state at a point in time."""
     timestamp: datetime
@@ -56,6 +88,41 @@ class SystemState:
     raw_data: dict = field(default_factory=dict)
 
 
+def _build_zone_state(zone, now: datetime) -> ZoneState:
+    """Build a ZoneState from a client zone object."""
+    # Old vs new client API differences
+    if USE_OLD_CLIENT:
+        zone_id = zone.id
+        setpoint_mode = zone.mode
+    else:
+        zone_id = zone.zone_id
+        setpoint_mode = zone.setpoint_mode
+
+    # Read each client property once; several are computed on access
+    name = zone.name
+    temp = zone.temperature
+    target = zone.target_heat_temperature
+    setpoint_status = getattr(zone, 'setpoint_status', None)
+    faults = getattr(zone, 'active_faults', None)
+
+    # Lazy %-formatting: this runs per zone per poll and DEBUG is normally off
+    logger.debug("Zone %s: %s°C -> %s°C (%s)", name, temp, target, setpoint_mode)
+
+    # IDs, names and modes repeat every poll; intern them so all
+    # states and logged rows share one string object each
+    return ZoneState(
+        zone_id=_intern(zone_id),
+        name=_intern(name),
+        current_temp=temp,
+        target_temp=target,
+        setpoint_mode=_intern(setpoint_mode),
+        until=_parse_until(setpoint_status.get('until') if setpoint_status else None),
+        is_available=temp is not None,
+        active_faults=list(faults) if faults is not None else [],
+        timestamp=now
+    )
+
+
 class EvohomePoller:
     """Polls the Evohome API and returns structured state data."""
     
@@ -64,20 +131,45 @@ class EvohomePoller:
         self.password = password or config.EVOHOME_PASSWORD
         self._client: Optional[EvohomeClient] = None
         self._last_login: Optional[datetime] = None
+        self._last_login_attempt: Optional[float] = None
+        # Temperature control system, resolved once per client
+        self._tcs = None
+        # zone_id -> client zone object, refreshed on every poll
+        self._zones_by_id: dict = {}
     
     async def _ensure_client(self):
         """Ensure we have an authenticated client."""
         if self._client is None:
+            if (
+                self._last_login_attempt is not None
+                and monotonic() - self._last_login_attempt < _MIN_LOGIN_INTERVAL_SECONDS
+            ):
+                raise RuntimeError("Evohome login attempted too recently, not retrying yet")
+            self._last_login_attempt = monotonic()
+            
+            # Built in locals and only stored once login and the location
+            # lookup succeed: poll() keeps the client across transient
+            # errors, so a half-initialised one would never be replaced
             logger.info("Creating new Evohome client connection")
             if USE_OLD_CLIENT:
                 logger.info("Using EvohomeClientOld (compatible with username/password)")
-                self._client = EvohomeClientOld(self.username, self.password)
+                client = EvohomeClientOld(self.username, self.password)
                 # Old client uses update() instead of login()
-                await self._client.update()
+                await client.update()
             else:
                 logger.info("Using EvohomeClient (new API)")
-                self._client = EvohomeClient(self.username, self.password)
-                await self._client.login()
+                client = EvohomeClient(self.username, self.password)
+                await client.login()
+            
+            # Old vs new client API differences
+            location = client.locations[0]
+            if USE_OLD_CLIENT:
+                tcs = location.gateways[0].systems[0]
+            else:
+                tcs = location._gateways[0]._control_systems[0]
+            
+            self._client = client
+            self._tcs = tcs
             self._last_login = datetime.now()
         return self._client
     
@@ -99,58 +191,23 @@ class EvohomePoller:
                 # New client refreshes specific location
                 await client.locations[0].refresh_status()
 
-            location = client.locations[0]
-
-            # Old vs new client API differences
-            if USE_OLD_CLIENT:
-                tcs = location.gateways[0].systems[0]
-                system_mode = tcs.mode
-            else:
-                tcs = location._gateways[0]._control_systems[0]
-                system_mode = tcs.system_mode
+            tcs = self._tcs
+            system_mode = tcs.mode if USE_OLD_CLIENT else tcs.system_mode
+            
+            # One timestamp for the whole poll; every zone shares it
+            now = datetime.now()
             
             # Extract zone states
-            zones = {}
-            for zone in tcs.zones:
-                # Old vs new client API differences
-                if USE_OLD_CLIENT:
-                    zone_id = zone.id
-                    setpoint_mode = zone.mode
-                else:
-                    zone_id = zone.zone_id
-                    setpoint_mode = zone.setpoint_mode
-
-                # Parse the until time if present
-                until = None
-                if hasattr(zone, 'setpoint_status') and zone.setpoint_status:
-                    until_str = zone.setpoint_status.get('until')
-                    if until_str:
-                        try:
-                            until = datetime.fromisoformat(until_str.replace('Z', '+00:00'))
-                        except (ValueError, AttributeError):
-                            pass
-
-                zone_state = ZoneState(
-                    zone_id=zone_id,
-                    name=zone.name,
-                    current_temp=zone.temperature,
-                    target_temp=zone.target_heat_temperature,
-                    setpoint_mode=setpoint_mode,
-                    until=until,
-                    is_available=zone.temperature is not None,
-                    active_faults=list(zone.active_faults) if hasattr(zone, 'active_faults') else [],
-                    timestamp=datetime.now()
-                )
-                zones[zone_id] = zone_state
-                
-                logger.debug(
-                    f"Zone {zone.name}: {zone.temperature}°C -> {zone.target_heat_temperature}°C "
-                    f"({setpoint_mode})"
-                )
+            zone_list = tcs.zones
+            states = [_build_zone_state(zone, now) for zone in zone_list]
+            zones = {zone_state.zone_id: zone_state for zone_state in states}
+            self._zones_by_id = {
+                zone_state.zone_id: zone for zone_state, zone in zip(states, zone_list)
+            }
             
             state = SystemState(
-                timestamp=datetime.now(),
-                system_mode=system_mode,
+                timestamp=now,
+                system_mode=_intern(system_mode),
                 zones=zones,
                 raw_data={}  # Could store raw API response here if needed
             )
@@ -160,10 +217,31 @@ class EvohomePoller:
             
         except Exception as e:
             logger.error(f"Error polling Evohome API: {e}")
-            # Reset client on error to force re-authentication
-            self._client = None
+            # Keep the session through network blips; anything else (auth
+            # failures included) resets the client to force re-authentication
+            if not _is_transient_error(e):
+                self._client = None
+                self._tcs = None
+                self._zones_by_id = {}
             raise
     
+    async def _find_zone(self, zone_id: str):
+        """Return the client zone object for zone_id, or None if unknown."""
+        zone = self._zones_by_id.get(zone_id)
+        if zone is not None:
+            return zone
+
+        # Not seen by a poll yet (or a new zone): index the client's zones
+        await self._ensure_client()
+
+        # Old vs new client API differences
+        if USE_OLD_CLIENT:
+            self._zones_by_id = {z.id: z for z in self._tcs.zones}
+        else:
+            self._zones_by_id = {z.zone_id: z for z in self._tcs.zones}
+
+        return self._zones_by_id.get(zone_id)
+    
     async def get_zone_schedule(self, zone_id: str) -> dict:
         """
         Get the schedule for a specific zone.
@@ -171,27 +249,11 @@ class EvohomePoller:
         Useful for determining what the zone *should* be doing.
         """
         try:
-            client = await self._ensure_client()
-            location = client.locations[0]
-
-            # Old vs new client API differences
-            if USE_OLD_CLIENT:
-                tcs = location.gateways[0].systems[0]
-            else:
-                tcs = location._gateways[0]._control_systems[0]
-
-            for zone in tcs.zones:
-                # Check zone ID based on client type
-                if USE_OLD_CLIENT:
-                    zone_match = (zone.id == zone_id)
-                else:
-                    zone_match = (zone.zone_id == zone_id)
+            zone = await self._find_zone(zone_id)
+            if zone is None:
+                return {}
 
-                if zone_match:
-                    schedule = await zone.get_schedule()
-                    return schedule
-
-            return {}
+            return await zone.get_schedule()
         except Exception as e:
             logger.error(f"Error fetching schedule for zone {zone_id}: {e}")
             return {}
@@ -203,28 +265,13 @@ class EvohomePoller:
         This is a remediation action, not typically called automatically.
         """
         try:
-            client = await self._ensure_client()
-            location = client.locations[0]
-
-            # Old vs new client API differences
-            if USE_OLD_CLIENT:
-                tcs = location.gateways[0].systems[0]
-            else:
-                tcs = location._gateways[0]._control_systems[0]
-
-            for zone in tcs.zones:
-                # Check zone ID based on client type
-                if USE_OLD_CLIENT:
-                    zone_match = (zone.id == zone_id)
-                else:
-                    zone_match = (zone.zone_id == zone_id)
+            zone = await self._find_zone(zone_id)
+            if zone is None:
+                return False
 
-                if zone_match:
-                    await zone.reset()
-                    logger.info(f"Cancelled override on zone {zone.name}")
-                    return True
-
-            return False
+            await zone.reset()
+            logger.info(f"Cancelled override on zone {zone.name}")
+            return True
         except Exception as e:
             logger.error(f"Error cancelling override for zone {zone_id}: {e}")
             return False
@@ -232,6 +279,8 @@ class EvohomePoller:
     async def close(self):
         """Close the client connection."""
         self._client = None
+        self._tcs = None
+        self._zones_by_id = {}
 
 
 # Synchronous wrapper for non-async contexts
@@ -240,23 +289,27 @@ class EvohomePollerSync:
     
     def __init__(self, username: str = None, password: str = None):
         self._async_poller = EvohomePoller(username, password)
+        # One loop for the wrapper's lifetime, so the client's HTTP session
+        # (tied to the loop it was created on) survives between calls
+        self._loop = asyncio.new_event_loop()
     
     def poll(self) -> SystemState:
-        import asyncio
-        return asyncio.get_event_loop().run_until_complete(self._async_poller.poll())
+        return self._loop.run_until_complete(self._async_poller.poll())
     
     def get_zone_schedule(self, zone_id: str) -> dict:
-        import asyncio
-        return asyncio.get_event_loop().run_until_complete(
+        return self._loop.run_until_complete(
             self._async_poller.get_zone_schedule(zone_id)
         )
     
     def cancel_override(self, zone_id: str) -> bool:
-        import asyncio
-        return asyncio.get_event_loop().run_until_complete(
+        return self._loop.run_until_complete(
             self._async_poller.cancel_override(zone_id)
         )
     
     def close(self):
-        import asyncio
-        asyncio.get_event_loop().run_until_complete(self._async_poller.close())
+        if self._loop.is_closed():
+            return
+        try:
+            self._loop.run_until_complete(self._async_poller.close())
+        finally:
+            self._loop.close()
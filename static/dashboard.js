@@ -0,0 +1,133 @@
+// Evohome HR92 Monitor - dashboard behaviour (section toggles, live updates)
+
+function toggleSection(sectionId) {
+    const content = document.getElementById(sectionId + '-content');
+    const icon = document.getElementById(sectionId + '-icon');
+
+    if (content.classList.contains('expanded')) {
+        content.classList.remove('expanded');
+        icon.classList.remove('expanded');
+    } else {
+        content.classList.add('expanded');
+        icon.classList.add('expanded');
+    }
+}
+
+// Auto-expand All Zones on desktop, collapsed on mobile
+if (window.innerWidth >= 768) {
+    document.getElementById('allZones-content').classList.add('expanded');
+    document.getElementById('allZones-icon').classList.add('expanded');
+}
+
+// Live updates: the server pushes state after every poll. Temperatures
+// are patched in place; when the set of overridden or offline zones (or
+// an override's mode) changes the page layout changes too, and a new
+// event id means the recent events list is out of date, so reload instead.
+function formatTemp(t) {
+    return (t ? t.toFixed(1) : '--') + '°';
+}
+
+function layoutKey(zones) {
+    const ids = Object.keys(zones).sort();
+    const overrides = ids.filter(id => zones[id].is_override)
+        .map(id => id + ':' + zones[id].setpoint_mode);
+    const offline = ids.filter(id => !zones[id].is_available);
+    return overrides.join(',') + '|' + offline.join(',');
+}
+
+// zone_id -> latest known fields, built from snapshots plus deltas
+let zones = null;
+
+function applyState(state) {
+    if (layoutKey(state.zones) !== document.body.dataset.layout ||
+            String(state.last_event_id) !== document.body.dataset.eventId) {
+        location.reload();
+        return;
+    }
+    const mode = document.getElementById('system-mode');
+    mode.textContent = state.system_mode || 'Unknown';
+    mode.className = 'status-badge ' + (state.system_mode === 'Auto' ? 'status-ok' : 'status-warning');
+    document.getElementById('last-update').textContent =
+        'Updated: ' + new Date(state.timestamp).toTimeString().slice(0, 8);
+    for (const [zoneId, zone] of Object.entries(state.zones)) {
+        document.querySelectorAll('[data-zone-id="' + CSS.escape(zoneId) + '"]').forEach(card => {
+            card.querySelector('.temp-value.current').textContent = formatTemp(zone.current_temp);
+            card.querySelector('.temp-value.target').textContent = formatTemp(zone.target_temp);
+        });
+    }
+}
+
+// Without a push channel, poll the JSON state once a minute instead.
+// Sending back the ETag lets unchanged polls return an empty 304.
+let stateEtag = null;
+let pollTimer = null;
+
+async function pollState() {
+    try {
+        const response = await fetch('/api/state', {
+            headers: stateEtag ? {'If-None-Match': stateEtag} : {}
+        });
+        if (response.ok) {
+            stateEtag = response.headers.get('ETag');
+            applyState(await response.json());
+        }
+    } catch (e) {
+        // Server unreachable; try again on the next tick
+    }
+}
+
+function startPolling() {
+    if (pollTimer === null) {
+        pollTimer = setInterval(pollState, 60000);
+    }
+}
+
+function stopPolling() {
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+// Reconnect after a dropped push channel (server restart, network blip),
+// backing off up to a minute; polling covers the gap. Each new connection
+// starts with a full snapshot.
+const RECONNECT_MIN_MS = 1000;
+const RECONNECT_MAX_MS = 60000;
+let reconnectDelay = RECONNECT_MIN_MS;
+
+function connect() {
+    const scheme = location.protocol === 'https:' ? 'wss://' : 'ws://';
+    const ws = new WebSocket(scheme + location.host + '/ws/state');
+    ws.onopen = () => {
+        reconnectDelay = RECONNECT_MIN_MS;
+        stopPolling();
+    };
+    ws.onmessage = event => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'snapshot') {
+            zones = message.zones;
+        } else if (message.type === 'delta' && zones) {
+            for (const [zoneId, changed] of Object.entries(message.zones)) {
+                zones[zoneId] = Object.assign(zones[zoneId] || {}, changed);
+            }
+        } else {
+            return;
+        }
+        applyState({
+            timestamp: message.timestamp,
+            system_mode: message.system_mode,
+            last_event_id: message.last_event_id,
+            zones: zones
+        });
+    };
+    ws.onclose = () => {
+        startPolling();
+        setTimeout(connect, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_MS);
+    };
+}
+
+if ('WebSocket' in window) {
+    connect();
+} else {
+    startPolling();
+}
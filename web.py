@@ -4,718 +4,432 @@ Evohome HR92 Monitor - Web Dashboard
 FastAPI-based web interface for monitoring and forensic analysis.
 """
 
+import asyncio
+import gzip
+import hashlib
 import logging
-from datetime import datetime
+import os
+import re
+import secrets
+from dataclasses import dataclass
+from time import monotonic
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
-import uvicorn
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import escape
 
 import config
+from detector import OverrideType
 from logger import ForensicLogger
-from poller import SystemState
+from poller import SystemState, ZoneState
+from jsonutil import dumps
 
 logger = logging.getLogger(__name__)
 
+
+class _FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed (see jsonutil)."""
+    
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
 app = FastAPI(
     title="Evohome HR92 Monitor",
     description="Monitoring, alerting, and forensic analysis for Evohome heating systems",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=_FastJSONResponse
 )
 
+# Rendered pages and event lists are mostly repeated markup/keys and shrink
+# several-fold; tiny bodies (health, 304s) aren't worth the overhead
+_GZIP_MINIMUM_SIZE = 1024
+app.add_middleware(GZipMiddleware, minimum_size=_GZIP_MINIMUM_SIZE, compresslevel=6)
+
 # Global state (set by main.py)
 _current_state: Optional[SystemState] = None
+# Dashboard template context derived from _current_state (zones sorted,
+# escaped and formatted), rebuilt once per poll
+_dashboard_context: dict = {}
+# _state_dict(_current_state) and the /api/state body and ETag, built once
+# per poll so requests only send bytes
+_state_data: Optional[dict] = None
+_state_body: Optional[bytes] = None
+_state_etag: Optional[str] = None
 _forensic_logger: Optional[ForensicLogger] = None
 
+# Dashboards subscribed to state pushes
+_ws_clients: set[WebSocket] = set()
+# Pending broadcast tasks (the event loop only keeps weak references)
+_broadcast_tasks: set[asyncio.Task] = set()
 
-def set_current_state(state: SystemState):
-    """Update the current state (called by the main polling loop)."""
-    global _current_state
-    _current_state = state
+# Idle dashboards are pinged this often so dead connections get dropped
+_WS_HEARTBEAT_SECONDS = 30
 
+# Pushes carry only changed zone fields; a full snapshot goes out this often
+# so clients can't drift
+_WS_RESYNC_SECONDS = 600
 
-def set_forensic_logger(forensic_logger: ForensicLogger):
-    """Set the forensic logger instance."""
-    global _forensic_logger
-    _forensic_logger = forensic_logger
-
-
-# =============================================================================
-# HTML TEMPLATES
-# =============================================================================
+# zone_id -> zone fields as last pushed, and when the last snapshot went out
+_last_broadcast: dict[str, dict] = {}
+_last_snapshot_time: Optional[float] = None
 
-DASHBOARD_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-    <title>Evohome HR92 Monitor</title>
-    <meta http-equiv="refresh" content="60">
-    <style>
-        :root {
-            --bg-dark: #1a1a2e;
-            --bg-card: #16213e;
-            --accent: #0f3460;
-            --text: #eee;
-            --text-muted: #888;
-            --success: #00d26a;
-            --warning: #ffc107;
-            --danger: #ff6b6b;
-            --info: #4dabf7;
-        }
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: var(--bg-dark);
-            color: var(--text);
-            padding: 15px;
-            min-height: 100vh;
-        }
 
-        /* Header - mobile first */
-        .header {
-            margin-bottom: 20px;
-            padding-bottom: 15px;
-            border-bottom: 2px solid var(--accent);
-        }
-        h1 {
-            font-size: 1.5em;
-            font-weight: 600;
-            margin-bottom: 10px;
-        }
-        .header-info {
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-        }
-        .status-badge {
-            padding: 8px 14px;
-            border-radius: 20px;
-            font-size: 0.9em;
-            font-weight: 500;
-            display: inline-block;
-            width: fit-content;
-        }
-        .status-ok { background: var(--success); color: #000; }
-        .status-warning { background: var(--warning); color: #000; }
-        .timestamp {
-            color: var(--text-muted);
-            font-size: 0.85em;
+def _state_dict(state: SystemState) -> dict:
+    """JSON-ready view of a SystemState (shared by /api/state and pushes)."""
+    return {
+        "timestamp": state.timestamp.isoformat(),
+        "system_mode": state.system_mode,
+        "zones": {
+            zone_id: {
+                "name": zone.name,
+                "current_temp": zone.current_temp,
+                "target_temp": zone.target_temp,
+                "setpoint_mode": zone.setpoint_mode,
+                "is_override": zone.is_override,
+                "is_available": zone.is_available
+            }
+            for zone_id, zone in state.zones.items()
         }
+    }
 
-        /* Navigation - mobile optimized */
-        .nav-links {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        .nav-links a {
-            color: var(--info);
-            text-decoration: none;
-            padding: 12px 18px;
-            border-radius: 8px;
-            background: var(--accent);
-            font-size: 0.9em;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
 
-        /* Override Alert Section - Prominent */
-        .override-alert {
-            background: linear-gradient(135deg, rgba(255, 107, 107, 0.2), rgba(255, 107, 107, 0.1));
-            border: 2px solid var(--danger);
-            border-radius: 12px;
-            padding: 20px;
-            margin-bottom: 25px;
-            box-shadow: 0 0 20px rgba(255, 107, 107, 0.3);
-        }
-        .override-alert h2 {
-            font-size: 1.3em;
-            margin-bottom: 15px;
-            color: var(--danger);
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        .override-count {
-            background: var(--danger);
-            color: #fff;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 0.8em;
-            font-weight: 600;
-        }
+async def _broadcast(message: str):
+    """Send a message to every connected dashboard, dropping dead ones."""
+    clients = list(_ws_clients)
+    results = await asyncio.gather(
+        *(ws.send_text(message) for ws in clients),
+        return_exceptions=True
+    )
+    for ws, result in zip(clients, results):
+        if isinstance(result, Exception):
+            _ws_clients.discard(ws)
+
+
+def _state_message(data: dict) -> str:
+    """
+    Build the push for a new state: a full snapshot when a resync is due,
+    otherwise only the zone fields that changed since the last push (the
+    timestamp, system mode and newest event id are always included).
+    """
+    global _last_broadcast, _last_snapshot_time
+    zones = data["zones"]
+    
+    now = monotonic()
+    if _last_snapshot_time is None or now - _last_snapshot_time >= _WS_RESYNC_SECONDS:
+        _last_broadcast = zones
+        _last_snapshot_time = now
+        return dumps({"type": "snapshot", **data}).decode()
+    
+    delta = {}
+    for zone_id, fields in zones.items():
+        previous = _last_broadcast.get(zone_id, {})
+        changed = {k: v for k, v in fields.items() if previous.get(k) != v}
+        if changed:
+            delta[zone_id] = changed
+    _last_broadcast = zones
+    
+    return dumps({
+        "type": "delta",
+        "timestamp": data["timestamp"],
+        "system_mode": data["system_mode"],
+        "last_event_id": data["last_event_id"],
+        "zones": delta
+    }).decode()
+
+
+@dataclass(slots=True)
+class _ZoneCard:
+    """Display-ready zone for the dashboard; name and faults are pre-escaped."""
+    zone_id: str
+    name: str
+    current_temp_str: str
+    target_temp_str: str
+    mode_label: str
+    mode_class: str
+    is_override: bool
+    is_available: bool
+    faults: list
+    has_faults: bool
+
+
+def _layout_key(zones: Iterable[ZoneState]) -> str:
+    """
+    Overridden zones (with their setpoint mode) and offline zone ids; the
+    dashboard reloads when these change (dashboard.js builds the same key).
+    """
+    by_id = {z.zone_id: z for z in zones}
+    ids = sorted(by_id)
+    overrides = [f"{i}:{by_id[i].setpoint_mode}" for i in ids if by_id[i].is_override]
+    offline = [i for i in ids if not by_id[i].is_available]
+    return ",".join(overrides) + "|" + ",".join(offline)
+
+
+# Badge class per setpoint mode (anything else is a permanent override)
+_MODE_CLASSES = {
+    "FollowSchedule": "mode-schedule",
+    "TemporaryOverride": "mode-override",
+}
+
+
+def _dashboard_state_context(state: Optional[SystemState]) -> dict:
+    """Dashboard template variables that depend only on the system state."""
+    zones = []
+    system_mode = "Unknown"
+    last_update = "Never"
 
-        /* Zone Cards - mobile first, larger touch targets */
-        .zone-card {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 18px;
-            border: 2px solid var(--accent);
-            margin-bottom: 15px;
-        }
-        .zone-card.override {
-            border-color: var(--danger);
-            background: linear-gradient(135deg, rgba(255, 107, 107, 0.1), var(--bg-card));
-        }
-        .zone-card.fault {
-            border-color: var(--warning);
-        }
-        .zone-name {
-            font-size: 1.15em;
-            font-weight: 600;
-            margin-bottom: 12px;
-        }
-        .zone-mode {
-            font-size: 0.75em;
-            padding: 5px 10px;
-            border-radius: 6px;
-            font-weight: 500;
-            margin-top: 5px;
-            display: inline-block;
-        }
-        .mode-schedule { background: var(--success); color: #000; }
-        .mode-override { background: var(--danger); color: #fff; }
-        .mode-permanent { background: var(--warning); color: #000; }
-
-        .temps {
-            display: flex;
-            justify-content: space-around;
-            gap: 15px;
-            margin: 15px 0;
-        }
-        .temp-block {
-            flex: 1;
-            text-align: center;
-        }
-        .temp-block label {
-            display: block;
-            font-size: 0.75em;
-            color: var(--text-muted);
-            margin-bottom: 8px;
-            text-transform: uppercase;
-        }
-        .temp-value {
-            font-size: 2.2em;
-            font-weight: 300;
-        }
-        .temp-value.current { color: var(--info); }
-        .temp-value.target { color: var(--warning); }
-        .temp-value.unavailable { color: var(--text-muted); opacity: 0.5; }
-
-        .fault-indicator {
-            margin-top: 10px;
-            padding: 10px;
-            background: rgba(255, 193, 7, 0.15);
-            border-left: 4px solid var(--warning);
-            border-radius: 6px;
-            font-size: 0.85em;
-            color: var(--warning);
-        }
-        .fault-indicator.offline {
-            background: rgba(255, 107, 107, 0.15);
-            border-left-color: var(--danger);
-            color: var(--danger);
-        }
+    if state:
+        system_mode = state.system_mode
+        last_update = state.timestamp.strftime("%H:%M:%S")
+
+        # Display strings are escaped and formatted here, once per zone;
+        # escaped (Markup) values pass through the template's autoescape as-is.
+        # Slotted attributes are also Jinja's fast lookup path (dict keys
+        # are only tried after getattr fails).
+        zones = [
+            _ZoneCard(
+                zone_id=zone.zone_id,
+                name=escape(zone.name),
+                current_temp_str="%.1f" % zone.current_temp if zone.current_temp else "--",
+                target_temp_str="%.1f" % zone.target_temp,
+                mode_label=zone.setpoint_mode.replace("Override", " Override"),
+                mode_class=_MODE_CLASSES.get(zone.setpoint_mode, "mode-permanent"),
+                is_override=zone.is_override,
+                is_available=zone.is_available,
+                faults=[escape(fault) for fault in zone.active_faults],
+                has_faults=len(zone.active_faults) > 0
+            )
+            for zone in sorted(state.zones.values(), key=lambda z: z.name)
+        ]
+
+    return dict(
+        zones=zones,
+        override_zones=[zone for zone in zones if zone.is_override],
+        system_mode=system_mode,
+        last_update=last_update,
+        layout_key=_layout_key(state.zones.values() if state else ())
+    )
 
-        /* Collapsible Section */
-        .collapsible-section {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 0;
-            margin-bottom: 20px;
-            border: 1px solid var(--accent);
-            overflow: hidden;
-        }
-        .collapsible-header {
-            padding: 18px;
-            cursor: pointer;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            min-height: 50px;
-            background: var(--accent);
-        }
-        .collapsible-header h2 {
-            font-size: 1.2em;
-            margin: 0;
-        }
-        .toggle-icon {
-            font-size: 1.2em;
-            transition: transform 0.3s;
-        }
-        .toggle-icon.expanded {
-            transform: rotate(180deg);
-        }
-        .collapsible-content {
-            padding: 15px;
-            display: none;
-        }
-        .collapsible-content.expanded {
-            display: block;
-        }
 
-        /* Events table - simplified for mobile */
-        .events-section {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 18px;
-            margin-bottom: 20px;
-            border: 1px solid var(--accent);
-        }
-        .events-section h2 {
-            font-size: 1.2em;
-            margin-bottom: 15px;
-            padding-bottom: 10px;
-            border-bottom: 1px solid var(--accent);
-        }
-        .event-item {
-            padding: 12px 0;
-            border-bottom: 1px solid var(--accent);
-        }
-        .event-item:last-child {
-            border-bottom: none;
-        }
-        .event-time {
-            color: var(--text-muted);
-            font-size: 0.8em;
-            margin-bottom: 5px;
-        }
-        .event-zone {
-            font-weight: 600;
-            margin-bottom: 3px;
-        }
-        .event-details {
-            font-size: 0.85em;
-            color: var(--text-muted);
-        }
+def set_current_state(state: SystemState):
+    """Update the current state (called by the main polling loop)."""
+    global _current_state, _dashboard_context, _state_data, _state_body, _state_etag
+    _current_state = state
+    _dashboard_context = _dashboard_state_context(state)
+    _state_data = _state_dict(state)
+    # Open dashboards reload when this moves on, which refreshes their
+    # recent events list (main stores a poll's events before calling here)
+    _state_data["last_event_id"] = _forensic_logger.last_event_id() if _forensic_logger else 0
+    _state_body = dumps(_state_data)
+    # A state only changes by being replaced, so its timestamp identifies it
+    _state_etag = _etag(state.timestamp.isoformat().encode())
+    
+    # Push to open dashboards instead of having them reload the page
+    if not _ws_clients:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    message = _state_message(_state_data)
+    task = loop.create_task(_broadcast(message))
+    _broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_tasks.discard)
 
-        /* Tablet and Desktop - responsive grid */
-        @media (min-width: 768px) {
-            body { padding: 30px; }
-            h1 { font-size: 2em; }
-            .header {
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }
-            .header-info {
-                flex-direction: row;
-                align-items: center;
-                gap: 20px;
-            }
-            .nav-links {
-                gap: 15px;
-            }
-            .nav-links a {
-                padding: 10px 18px;
-                min-height: auto;
-            }
 
-            /* Grid layout for override cards on desktop */
-            .override-cards {
-                display: grid;
-                grid-template-columns: repeat(auto-fill, minmax(320px, 1fr));
-                gap: 20px;
-            }
-            .override-cards .zone-card {
-                margin-bottom: 0;
-            }
+def set_forensic_logger(forensic_logger: ForensicLogger):
+    """Set the forensic logger instance."""
+    global _forensic_logger
+    _forensic_logger = forensic_logger
 
-            /* Grid layout for all zones on desktop */
-            .zone-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-                gap: 20px;
-            }
-            .zone-grid .zone-card {
-                margin-bottom: 0;
-            }
 
-            .collapsible-content {
-                padding: 20px;
-            }
-        }
+def _etag(value: bytes) -> str:
+    """
+    Weak ETag for a response version. Weak because GZipMiddleware may send
+    the same version gzip-encoded or not, and a strong tag must name one
+    exact byte sequence.
+    """
+    return 'W/"%s"' % hashlib.sha1(value).hexdigest()
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names this version (weak comparison)."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _add_vary(headers: dict, body: Optional[bytes]):
+    """
+    Mark a response as varying by Accept-Encoding where GZipMiddleware won't:
+    it adds Vary itself to every body of at least _GZIP_MINIMUM_SIZE (and to
+    streams) that isn't already encoded, so only 304s, small bodies and
+    pre-compressed ones need it here.
+    """
+    if body is None or len(body) < _GZIP_MINIMUM_SIZE or "Content-Encoding" in headers:
+        headers["Vary"] = "Accept-Encoding"
+
+
+def _etag_response(
+    request: Request,
+    etag: str,
+    body: Optional[bytes] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """Response carrying an ETag, or 304 Not Modified (body unused) if it matches."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None or _not_modified(request, etag):
+        _add_vary(headers, None)
+        return Response(status_code=304, headers=headers)
+    _add_vary(headers, body)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _stream_events_json(events: Iterator[dict]) -> Iterator[bytes]:
+    """Encode {"events": [...], "count": N} one event at a time."""
+    yield b'{"events": ['
+    count = 0
+    for event in events:
+        yield (b"," if count else b"") + dumps(event)
+        count += 1
+    yield b'], "count": %d}' % count
 
-        @media (min-width: 1200px) {
-            .zone-grid {
-                grid-template-columns: repeat(3, 1fr);
-            }
-            .override-cards {
-                grid-template-columns: repeat(2, 1fr);
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>🏠 Evohome Monitor</h1>
-        <div class="header-info">
-            <span class="status-badge {{ 'status-ok' if system_mode == 'Auto' else 'status-warning' }}">
-                {{ system_mode or 'Unknown' }}
-            </span>
-            <span class="timestamp">Updated: {{ last_update }}</span>
-        </div>
-    </div>
-
-    <div class="nav-links">
-        <a href="/">Dashboard</a>
-        <a href="/forensics">Forensics</a>
-    </div>
-
-    <!-- Active Overrides Section - Prominent at Top -->
-    {% if active_overrides %}
-    <div class="override-alert">
-        <h2>
-            ⚠️ Active Overrides
-            <span class="override-count">{{ active_overrides|length }}</span>
-        </h2>
-        <div class="override-cards">
-            {% for zone in override_zones %}
-            <div class="zone-card override">
-                <div class="zone-name">{{ zone.name }}</div>
-                <div class="zone-mode {{ 'mode-override' if zone.setpoint_mode == 'TemporaryOverride' else 'mode-permanent' }}">
-                    {{ zone.setpoint_mode.replace('Override', ' Override') }}
-                </div>
-                <div class="temps">
-                    <div class="temp-block">
-                        <label>Current</label>
-                        <div class="temp-value current {{ 'unavailable' if not zone.is_available else '' }}">
-                            {{ '%.1f' % zone.current_temp if zone.current_temp else '--' }}°
-                        </div>
-                    </div>
-                    <div class="temp-block">
-                        <label>Target</label>
-                        <div class="temp-value target">{{ '%.1f' % zone.target_temp }}°</div>
-                    </div>
-                </div>
-                {% if not zone.is_available %}
-                <div class="fault-indicator offline">⚠️ No temperature reading</div>
-                {% endif %}
-                {% for fault in zone.active_faults %}
-                <div class="fault-indicator">🔧 {{ fault }}</div>
-                {% endfor %}
-            </div>
-            {% endfor %}
-        </div>
-    </div>
-    {% endif %}
-
-    <!-- All Zones - Collapsible -->
-    <div class="collapsible-section">
-        <div class="collapsible-header" onclick="toggleSection('allZones')">
-            <h2>📍 All Zones ({{ zones|length }})</h2>
-            <span class="toggle-icon" id="allZones-icon">▼</span>
-        </div>
-        <div class="collapsible-content" id="allZones-content">
-            <div class="zone-grid">
-                {% for zone in zones %}
-                <div class="zone-card {{ 'fault' if zone.has_faults or not zone.is_available else '' }}">
-                    <div class="zone-name">{{ zone.name }}</div>
-                    <div class="zone-mode {{ 'mode-schedule' if zone.setpoint_mode == 'FollowSchedule' else 'mode-override' if zone.setpoint_mode == 'TemporaryOverride' else 'mode-permanent' }}">
-                        {{ zone.setpoint_mode.replace('Override', ' Override') }}
-                    </div>
-                    <div class="temps">
-                        <div class="temp-block">
-                            <label>Current</label>
-                            <div class="temp-value current {{ 'unavailable' if not zone.is_available else '' }}">
-                                {{ '%.1f' % zone.current_temp if zone.current_temp else '--' }}°
-                            </div>
-                        </div>
-                        <div class="temp-block">
-                            <label>Target</label>
-                            <div class="temp-value target">{{ '%.1f' % zone.target_temp }}°</div>
-                        </div>
-                    </div>
-                    {% if not zone.is_available %}
-                    <div class="fault-indicator offline">⚠️ No temperature reading</div>
-                    {% endif %}
-                    {% for fault in zone.active_faults %}
-                    <div class="fault-indicator">🔧 {{ fault }}</div>
-                    {% endfor %}
-                </div>
-                {% endfor %}
-            </div>
-        </div>
-    </div>
-
-    <!-- Recent Events - Collapsible -->
-    <div class="collapsible-section">
-        <div class="collapsible-header" onclick="toggleSection('events')">
-            <h2>📊 Recent Events (Last 24h)</h2>
-            <span class="toggle-icon" id="events-icon">▼</span>
-        </div>
-        <div class="collapsible-content" id="events-content">
-            {% if recent_events %}
-                {% for event in recent_events %}
-                <div class="event-item">
-                    <div class="event-time">{{ event.time }}</div>
-                    <div class="event-zone">{{ event.zone_name }}</div>
-                    <div class="event-details">
-                        {{ event.event_type }}: {{ event.previous_target }}° → {{ event.new_target }}°
-                        {% if event.override_type %} ({{ event.override_type }}){% endif %}
-                    </div>
-                </div>
-                {% endfor %}
-            {% else %}
-                <p style="color: var(--text-muted);">No events in the last 24 hours.</p>
-            {% endif %}
-        </div>
-    </div>
-
-    <script>
-        function toggleSection(sectionId) {
-            const content = document.getElementById(sectionId + '-content');
-            const icon = document.getElementById(sectionId + '-icon');
-
-            if (content.classList.contains('expanded')) {
-                content.classList.remove('expanded');
-                icon.classList.remove('expanded');
-            } else {
-                content.classList.add('expanded');
-                icon.classList.add('expanded');
-            }
-        }
 
-        // Auto-expand All Zones on desktop, collapsed on mobile
-        if (window.innerWidth >= 768) {
-            document.getElementById('allZones-content').classList.add('expanded');
-            document.getElementById('allZones-icon').classList.add('expanded');
-        }
-    </script>
-</body>
-</html>
-"""
+# =============================================================================
+# HTML TEMPLATES
+# =============================================================================
 
-FORENSICS_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Forensics - Evohome Monitor</title>
-    <style>
-        :root {
-            --bg-dark: #1a1a2e;
-            --bg-card: #16213e;
-            --accent: #0f3460;
-            --text: #eee;
-            --text-muted: #888;
-            --success: #00d26a;
-            --warning: #ffc107;
-            --danger: #ff6b6b;
-            --info: #4dabf7;
-        }
-        * { box-sizing: border-box; margin: 0; padding: 0; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: var(--bg-dark);
-            color: var(--text);
-            padding: 20px;
-        }
-        h1 { margin-bottom: 30px; }
-        h2 { margin: 30px 0 15px; font-size: 1.2em; color: var(--info); }
-        
-        .nav-links {
-            display: flex;
-            gap: 15px;
-            margin-bottom: 30px;
-        }
-        .nav-links a {
-            color: var(--info);
-            text-decoration: none;
-            padding: 8px 16px;
-            border-radius: 6px;
-            background: var(--accent);
-        }
-        
-        .stat-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-        .stat-card {
-            background: var(--bg-card);
-            padding: 25px;
-            border-radius: 12px;
-            text-align: center;
-            border: 1px solid var(--accent);
-        }
-        .stat-value {
-            font-size: 3em;
-            font-weight: 300;
-            color: var(--info);
-        }
-        .stat-value.danger { color: var(--danger); }
-        .stat-label {
-            color: var(--text-muted);
-            font-size: 0.85em;
-            margin-top: 10px;
-            text-transform: uppercase;
-        }
-        
-        .section {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 25px;
-            margin-bottom: 25px;
-            border: 1px solid var(--accent);
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-        th, td {
-            padding: 12px;
-            text-align: left;
-            border-bottom: 1px solid var(--accent);
-        }
-        th { color: var(--text-muted); font-size: 0.85em; text-transform: uppercase; }
-        
-        .bar-chart {
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-        }
-        .bar-row {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        .bar-label {
-            width: 80px;
-            font-size: 0.85em;
-            color: var(--text-muted);
-        }
-        .bar-container {
-            flex: 1;
-            height: 24px;
-            background: var(--accent);
-            border-radius: 4px;
-            overflow: hidden;
-        }
-        .bar-fill {
-            height: 100%;
-            background: var(--info);
-            border-radius: 4px;
-            display: flex;
-            align-items: center;
-            padding-left: 10px;
-            font-size: 0.8em;
-            min-width: 30px;
-        }
-    </style>
-</head>
-<body>
-    <h1>🔍 Forensic Analysis</h1>
+# Page templates live in templates/; static/ holds the stylesheets they link
+_TEMPLATE_DIR = Path(__file__).parent / "templates"
+
+# Compiled template bytecode lives next to the database: data/ is the one
+# directory the systemd unit leaves writable (and /tmp is private to each run)
+_JINJA_CACHE_DIR = config.DATA_DIR / "jinja_cache"
+
+# Options that change the compiled output. Templates are only read at startup
+# (no reload check), so edits to templates/ need a restart. trim_blocks/lstrip_blocks
+# strip the whitespace left behind by block tags.
+_JINJA_OPTIONS = dict(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """Return the on-disk bytecode cache, or None if no safe directory exists.
+
+    Compiled templates survive restarts (keyed by a checksum of the source, so
+    edited templates are recompiled). The directory is private to this user
+    so cached bytecode can't be planted by someone else; if it can't be made
+    so, templates are simply compiled on every start.
+    """
+    try:
+        _JINJA_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if _JINJA_CACHE_DIR.stat().st_uid != os.getuid():
+            raise PermissionError(f"{_JINJA_CACHE_DIR} is owned by another user")
+        # mkdir leaves an existing directory's mode alone
+        _JINJA_CACHE_DIR.chmod(0o700)
+    except OSError as e:
+        logger.warning(f"Template bytecode cache disabled: {e}")
+        return None
+    # Jinja keys cached bytecode on template name and source only, so tag the
+    # files with the compile options to keep a settings change from reusing
+    # stale bytecode
+    tag = hashlib.sha1(repr(sorted(_JINJA_OPTIONS.items())).encode()).hexdigest()[:12]
+    return FileSystemBytecodeCache(str(_JINJA_CACHE_DIR), f"__jinja2_{tag}_%s.cache")
+
+
+# Stylesheets and the dashboard script. Browsers may cache them for a week;
+# pages link them with ?v=<content hash> so an edited file is fetched again.
+_STATIC_DIR = Path(__file__).parent / "static"
+_STATIC_MAX_AGE_SECONDS = 7 * 24 * 3600
+_STATIC_MEDIA_TYPES = {".css": "text/css", ".js": "text/javascript"}
+
+# CSS minification: drop comments, collapse whitespace, then drop it around
+# punctuation (none of the stylesheets rely on spaces there)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_WHITESPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_WHITESPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def _load_static_assets() -> dict[str, tuple[bytes, bytes, str, str]]:
+    """
+    Read (minifying stylesheets) and gzip each static file once:
+    name -> (body, gzipped body, ETag, gzipped ETag, media type).
     
-    <div class="nav-links">
-        <a href="/">Dashboard</a>
-        <a href="/forensics">Forensics</a>
-        <a href="/api/diagnostics">API: Diagnostics</a>
-    </div>
-    
-    <div class="stat-grid">
-        <div class="stat-card">
-            <div class="stat-value">{{ total_overrides }}</div>
-            <div class="stat-label">Total Overrides (30d)</div>
-        </div>
-        <div class="stat-card">
-            <div class="stat-value danger">{{ total_suspicious }}</div>
-            <div class="stat-label">Suspicious Events</div>
-        </div>
-        <div class="stat-card">
-            <div class="stat-value">{{ most_problematic_zone }}</div>
-            <div class="stat-label">Most Problematic Zone</div>
-        </div>
-        <div class="stat-card">
-            <div class="stat-value">{{ peak_hour }}:00</div>
-            <div class="stat-label">Peak Override Hour</div>
-        </div>
-    </div>
-    
-    <div class="section">
-        <h2>Override Frequency by Zone</h2>
-        {% if zone_frequency %}
-        <table>
-            <thead>
-                <tr>
-                    <th>Zone</th>
-                    <th>Total Overrides</th>
-                    <th>Suspicious</th>
-                    <th>Frequency</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for zone in zone_frequency %}
-                <tr>
-                    <td>{{ zone.zone_name }}</td>
-                    <td>{{ zone.override_count }}</td>
-                    <td style="color: var(--danger);">{{ zone.suspicious_count }}</td>
-                    <td>
-                        <div class="bar-container" style="width: 200px;">
-                            <div class="bar-fill" style="width: {{ zone.percentage }}%;">
-                                {{ zone.override_count }}
-                            </div>
-                        </div>
-                    </td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-        {% else %}
-        <p style="color: var(--text-muted);">No override data yet.</p>
-        {% endif %}
-    </div>
-    
-    <div class="section">
-        <h2>Override Distribution by Hour</h2>
-        <div class="bar-chart">
-            {% for hour in time_distribution %}
-            <div class="bar-row">
-                <span class="bar-label">{{ '%02d' % hour.hour }}:00</span>
-                <div class="bar-container">
-                    <div class="bar-fill" style="width: {{ hour.percentage }}%;">
-                        {{ hour.count }}
-                    </div>
-                </div>
-            </div>
-            {% endfor %}
-        </div>
-    </div>
-    
-    <div class="section">
-        <h2>Classification Distribution</h2>
-        <table>
-            <thead>
-                <tr>
-                    <th>Type</th>
-                    <th>Count</th>
-                    <th>Avg Confidence</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for item in type_distribution %}
-                <tr>
-                    <td>{{ item.override_type }}</td>
-                    <td>{{ item.count }}</td>
-                    <td>{{ '%.0f' % (item.avg_confidence * 100) }}%</td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-    </div>
-</body>
-</html>
-"""
+    These are served with their Content-Encoding set here, so each coding
+    gets its own strong ETag.
+    """
+    assets = {}
+    for path in sorted(_STATIC_DIR.iterdir()):
+        media_type = _STATIC_MEDIA_TYPES.get(path.suffix)
+        if media_type is None:
+            continue
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".css":
+            text = _minify_css(text)
+        body = text.encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()
+        assets[path.name] = (
+            body, gzip.compress(body, 9), f'"{digest}"', f'"{digest}-gzip"', media_type
+        )
+    return assets
+
+
+_STATIC_ASSETS = _load_static_assets()
+_STATIC_VERSION = hashlib.sha1(
+    "".join(asset[2] for asset in _STATIC_ASSETS.values()).encode()
+).hexdigest()[:12]
+
+
+# Compiled (or loaded from the bytecode cache) once at import, so even the
+# first request after a restart only renders
+_jinja_env = Environment(
+    loader=FileSystemLoader(str(_TEMPLATE_DIR)),
+    auto_reload=False,
+    cache_size=16,
+    bytecode_cache=_bytecode_cache(),
+    **_JINJA_OPTIONS
+)
+_jinja_env.globals["static_version"] = _STATIC_VERSION
+_DASHBOARD_TPL = _jinja_env.get_template("dashboard.html")
+_FORENSICS_TPL = _jinja_env.get_template("forensics.html")
+
+# Mixed into the page ETags and cache keys. The pages also depend on the
+# templates, the static assets they link and the code rendering them, none
+# of which the state/event keys cover (with --web-only those stay None), so
+# a restart, which is what picks up any such edit, starts a new version.
+_PAGE_VERSION = f"{_STATIC_VERSION}-{secrets.token_hex(6)}"
+
+# Display labels for stored event types and override classifications; values
+# missing here (e.g. rows written by older versions) are formatted on the fly
+_EVENT_TYPE_LABELS = {
+    "override_start": "Override Start",
+    "override_cleared": "Override Cleared",
+}
+_OVERRIDE_TYPE_LABELS = {t.value: t.value.replace("_", " ") for t in OverrideType}
+
+# ((page version, state timestamp, newest event id), rendered dashboard). Between polls the
+# page can only change when an event is logged, so repeat loads skip the
+# render. (Events ageing out of the 24h list wait for the next poll.)
+_dashboard_cache: Optional[tuple[tuple, bytes]] = None
+
+# ((page version, newest event id), monotonic time rendered, page, ETag). The page changes
+# when events are logged or age out of the 30-day window; the TTL bounds how
+# long the latter can go unnoticed.
+_forensics_cache: Optional[tuple[tuple, float, bytes, str]] = None
+_FORENSICS_CACHE_TTL_SECONDS = 60
 
 
 # =============================================================================
@@ -725,71 +439,74 @@ FORENSICS_HTML = """
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Main dashboard page."""
-    from jinja2 import Template
-
-    zones = []
-    override_zones = []
-    active_overrides = []
-    system_mode = "Unknown"
-    last_update = "Never"
+    global _dashboard_cache
+    last_event_id = _forensic_logger.last_event_id() if _forensic_logger else 0
+    cache_key = (_PAGE_VERSION, _current_state.timestamp if _current_state else None, last_event_id)
+    # The cache key identifies the page content, so reloads of an unchanged
+    # page are answered without a body
+    etag = _etag(repr(cache_key).encode())
+    if _not_modified(request, etag):
+        return _etag_response(request, etag)
+    if _dashboard_cache is not None and _dashboard_cache[0] == cache_key:
+        return _etag_response(request, etag, _dashboard_cache[1], "text/html")
+    
+    # Rendering (and its event query) runs in a worker thread: this loop also
+    # drives the poller and live pushes
+    context = _dashboard_context or _dashboard_state_context(None)
+    html = await asyncio.to_thread(_render_dashboard, context, last_event_id)
+    _dashboard_cache = (cache_key, html)
+    return _etag_response(request, etag, html, "text/html")
 
-    if _current_state:
-        system_mode = _current_state.system_mode
-        last_update = _current_state.timestamp.strftime("%H:%M:%S")
 
-        for zone in _current_state.zones.values():
-            zone_data = {
-                "name": zone.name,
-                "current_temp": zone.current_temp,
-                "target_temp": zone.target_temp,
-                "setpoint_mode": zone.setpoint_mode,
-                "is_override": zone.is_override,
-                "is_available": zone.is_available,
-                "active_faults": zone.active_faults,
-                "has_faults": len(zone.active_faults) > 0
-            }
-            zones.append(zone_data)
-
-            if zone.is_override:
-                override_zones.append(zone_data)
-                active_overrides.append({
-                    "name": zone.name,
-                    "mode": zone.setpoint_mode,
-                    "target": zone.target_temp,
-                    "since": zone.timestamp.strftime("%H:%M")
-                })
-
-    # Get recent events
+def _render_dashboard(context: dict, last_event_id: int) -> bytes:
+    """Render the dashboard from a prepared state context plus recent events."""
     recent_events = []
     if _forensic_logger:
-        events = _forensic_logger.get_override_events(days=1)
-        for e in events[:10]:
+        # Timestamps come back as "YYYY-MM-DDTHH:MM:SS" (see logger._ISO_TIMESTAMP),
+        # so HH:MM is a fixed slice
+        for e in _forensic_logger.get_override_events(days=1, limit=10):
             recent_events.append({
-                "time": datetime.fromisoformat(e["timestamp"]).strftime("%H:%M"),
-                "zone_name": e["zone_name"],
-                "event_type": e["event_type"].replace("_", " ").title(),
+                "time": e["timestamp"][11:16],
+                "zone_name": escape(e["zone_name"]),
+                "event_type": _EVENT_TYPE_LABELS.get(e["event_type"])
+                    or escape(e["event_type"].replace("_", " ").title()),
                 "previous_target": e["previous_target"],
                 "new_target": e["new_target"],
-                "override_type": str(e.get("override_type") or "").replace("_", " ")
+                "override_type": _OVERRIDE_TYPE_LABELS.get(e.get("override_type"))
+                    or escape(str(e.get("override_type") or "").replace("_", " "))
             })
 
-    template = Template(DASHBOARD_HTML)
-    html = template.render(
-        zones=sorted(zones, key=lambda z: z["name"]),
-        override_zones=sorted(override_zones, key=lambda z: z["name"]),
-        active_overrides=active_overrides,
-        recent_events=recent_events,
-        system_mode=system_mode,
-        last_update=last_update
-    )
-    return HTMLResponse(content=html)
+    # Zone cards and header were prepared when the state arrived
+    return _DASHBOARD_TPL.render(
+        recent_events=recent_events, last_event_id=last_event_id, **context
+    ).encode("utf-8")
 
 
 @app.get("/forensics", response_class=HTMLResponse)
 async def forensics_page(request: Request):
     """Forensics analysis page."""
-    from jinja2 import Template
-    
+    global _forensics_cache
+    # last_event_id() is an in-memory read, so checking the cache never
+    # waits on the database; only a render (in a worker thread) queries it
+    last_event_id = _forensic_logger.last_event_id() if _forensic_logger else 0
+    cache_key = (_PAGE_VERSION, last_event_id)
+    now = monotonic()
+    if (
+        _forensics_cache is not None
+        and _forensics_cache[0] == cache_key
+        and now - _forensics_cache[1] < _FORENSICS_CACHE_TTL_SECONDS
+    ):
+        html, etag = _forensics_cache[2], _forensics_cache[3]
+    else:
+        html = await asyncio.to_thread(_render_forensics)
+        etag = _etag(_PAGE_VERSION.encode() + html)
+        _forensics_cache = (cache_key, now, html, etag)
+    # Tagged by content (as for /api/diagnostics) and the page version
+    return _etag_response(request, etag, html, "text/html")
+
+
+def _render_forensics() -> bytes:
+    """Render the forensics page from the 30-day diagnostics summary."""
     total_overrides = 0
     total_suspicious = 0
     most_problematic_zone = "-"
@@ -804,30 +521,19 @@ async def forensics_page(request: Request):
         total_overrides = diagnostics["total_overrides"]
         total_suspicious = diagnostics["total_suspicious"]
         
-        # Zone frequency
-        zone_freq = diagnostics["zone_frequency"]
-        max_count = max((z["override_count"] for z in zone_freq), default=1)
-        for z in zone_freq:
-            z["percentage"] = (z["override_count"] / max_count) * 100
-        zone_frequency = zone_freq
+        # Bar widths (percentage of the busiest row) come from the queries
+        zone_frequency = diagnostics["zone_frequency"]
+        if zone_frequency:
+            most_problematic_zone = zone_frequency[0]["zone_name"]
         
-        if zone_freq:
-            most_problematic_zone = zone_freq[0]["zone_name"]
-        
-        # Time distribution
-        time_dist = diagnostics["time_distribution"]
-        max_count = max((t["count"] for t in time_dist), default=1)
-        for t in time_dist:
-            t["percentage"] = (t["count"] / max_count) * 100
-        time_distribution = sorted(time_dist, key=lambda x: x["hour"])
-        
-        if time_dist:
-            peak_hour = max(time_dist, key=lambda x: x["count"])["hour"]
+        # Already ordered by hour
+        time_distribution = diagnostics["time_distribution"]
+        if time_distribution:
+            peak_hour = max(time_distribution, key=lambda x: x["count"])["hour"]
         
         type_distribution = diagnostics["type_distribution"]
     
-    template = Template(FORENSICS_HTML)
-    html = template.render(
+    return _FORENSICS_TPL.render(
         total_overrides=total_overrides,
         total_suspicious=total_suspicious,
         most_problematic_zone=most_problematic_zone,
@@ -835,35 +541,44 @@ async def forensics_page(request: Request):
         zone_frequency=zone_frequency,
         time_distribution=time_distribution,
         type_distribution=type_distribution
-    )
-    return HTMLResponse(content=html)
+    ).encode("utf-8")
 
 
 @app.get("/api/state")
-async def get_state():
+async def get_state(request: Request):
     """Get current system state as JSON."""
     if not _current_state:
         raise HTTPException(status_code=503, detail="No state available yet")
     
-    return {
-        "timestamp": _current_state.timestamp.isoformat(),
-        "system_mode": _current_state.system_mode,
-        "zones": {
-            zone_id: {
-                "name": zone.name,
-                "current_temp": zone.current_temp,
-                "target_temp": zone.target_temp,
-                "setpoint_mode": zone.setpoint_mode,
-                "is_override": zone.is_override,
-                "is_available": zone.is_available
-            }
-            for zone_id, zone in _current_state.zones.items()
-        }
-    }
+    # Body and ETag were prepared when the state arrived
+    return _etag_response(request, _state_etag, _state_body)
+
+
+@app.websocket("/ws/state")
+async def state_updates(websocket: WebSocket):
+    """Push the system state to a dashboard after every poll."""
+    await websocket.accept()
+    _ws_clients.add(websocket)
+    try:
+        # Start every client from a full snapshot; later pushes are deltas
+        if _current_state:
+            await websocket.send_text(dumps({"type": "snapshot", **_state_data}).decode())
+        while True:
+            # Clients don't send anything; waiting on receive just detects
+            # disconnects, and the timeout drives the heartbeat
+            try:
+                await asyncio.wait_for(websocket.receive_text(), timeout=_WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_text('{"type": "ping"}')
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        _ws_clients.discard(websocket)
 
 
 @app.get("/api/events")
 async def get_events(
+    request: Request,
     zone_id: str = None,
     override_type: str = None,
     days: int = 30,
@@ -873,32 +588,79 @@ async def get_events(
     if not _forensic_logger:
         raise HTTPException(status_code=503, detail="Forensic logger not available")
     
-    events = _forensic_logger.get_override_events(
+    # The result can only change when events enter or leave the window, so
+    # the window's version plus the filters identify it. The lookup is a
+    # query, so like everything else touching the database it runs off the loop.
+    version = await asyncio.to_thread(_forensic_logger.override_events_version, days)
+    etag = _etag(repr((version, zone_id, override_type, days, suspicious_only)).encode())
+    if _not_modified(request, etag):
+        return _etag_response(request, etag)
+    
+    # Streamed straight from the cursor so large windows never sit in memory
+    events = _forensic_logger.iter_override_events(
         zone_id=zone_id,
         override_type=override_type,
         days=days,
         suspicious_only=suspicious_only
     )
-    return {"events": events, "count": len(events)}
+    return StreamingResponse(
+        _stream_events_json(events),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
 
 
 @app.get("/api/diagnostics")
-async def get_diagnostics(days: int = 30):
+async def get_diagnostics(request: Request, days: int = 30):
     """Get diagnostic summary."""
     if not _forensic_logger:
         raise HTTPException(status_code=503, detail="Forensic logger not available")
     
-    return _forensic_logger.get_diagnostics_summary(days)
+    # The summary queries are served from the logger's query cache; tagging
+    # the serialized body catches both new events and ones ageing out. Cache
+    # misses run the three aggregates, so keep them off the event loop.
+    summary = await asyncio.to_thread(_forensic_logger.get_diagnostics_summary, days)
+    body = dumps(summary)
+    return _etag_response(request, _etag(body), body)
 
 
 @app.get("/api/zone/{zone_id}/history")
-async def get_zone_history(zone_id: str, hours: int = 24):
+async def get_zone_history(request: Request, zone_id: str, hours: int = 24):
     """Get history for a specific zone."""
     if not _forensic_logger:
         raise HTTPException(status_code=503, detail="Forensic logger not available")
     
-    history = _forensic_logger.get_zone_history(zone_id, hours)
-    return {"zone_id": zone_id, "history": history}
+    # As for /api/events: unchanged unless history rows entered or left the window
+    version = await asyncio.to_thread(_forensic_logger.zone_history_version, hours)
+    etag = _etag(repr((version, zone_id, hours)).encode())
+    if _not_modified(request, etag):
+        return _etag_response(request, etag)
+    
+    history = await asyncio.to_thread(_forensic_logger.get_zone_history, zone_id, hours)
+    return _etag_response(request, etag, dumps({"zone_id": zone_id, "history": history}))
+
+
+@app.get("/static/{name}", include_in_schema=False)
+async def static_asset(request: Request, name: str):
+    """Serve a static file from memory, pre-compressed for clients that accept gzip."""
+    asset = _STATIC_ASSETS.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    body, gzipped, etag, gzipped_etag, media_type = asset
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "ETag": gzipped_etag if use_gzip else etag,
+        "Cache-Control": f"public, max-age={_STATIC_MAX_AGE_SECONDS}, immutable"
+    }
+    if _not_modified(request, headers["ETag"]):
+        _add_vary(headers, None)
+        return Response(status_code=304, headers=headers)
+    # Already compressed, so GZipMiddleware passes it through untouched
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        body = gzipped
+    _add_vary(headers, body)
+    return Response(content=body, media_type=media_type, headers=headers)
 
 
 @app.get("/health")
@@ -913,6 +675,10 @@ async def health_check():
 
 def run_server():
     """Run the web server."""
+    # Imported here: only the standalone server needs it (main.py imports
+    # uvicorn itself when it serves the app)
+    import uvicorn
+    
     uvicorn.run(
         app,
         host=config.WEB_HOST,